@@ -2,13 +2,18 @@
 This module contains the :class:`Config` class.
 """
 
+import copy
 import io
+import logging
+import os
 
 import numpy as np
 import yaml
 
 from classic_framework.utils.sim_path import sim_framework_path
 
+logger = logging.getLogger(__name__)
+
 
 class Config:
     """
@@ -18,8 +23,13 @@ class Config:
     - save a file as .yaml
     - load a .yaml file
     - return a list of keys and values as dictionary
+
+    Parsed .yaml files are cached for all instances and reloaded once the modification time of the file changes.
     """
 
+    # absolute path of the .yaml file -> (modification time, parsed data, gains as numpy arrays)
+    _yaml_cache = {}
+
     def __init__(self, config_dir):
         """
         Initializes configuration directory.
@@ -75,14 +85,42 @@ class Config:
         :param path_of_file: path to the file, but it does not include the file name itself
         :return: the dictionary
         """
+        return copy.deepcopy(self._load_cached_yaml(file_name, path_of_file)[1])
+
+    def load_gains(self, file_name, path_of_file=None):
+        """
+        load the numeric entries of a .yaml file (e.g. controller gains) as float64 numpy arrays. The arrays are shared
+        between all callers and therefore read-only.
+
+        :param file_name: file name without .yaml ending
+        :param path_of_file: path to the file, but it does not include the file name itself
+        :return: dictionary with the read-only numpy arrays
+        """
+        _, data, gains = self._load_cached_yaml(file_name, path_of_file)
+        if not gains:
+            for key, value in data.items():
+                try:
+                    gain = np.array(value, dtype=np.float64)
+                except (TypeError, ValueError):
+                    continue
+                gain.setflags(write=False)
+                gains[key] = gain
+        return dict(gains)
+
+    def _load_cached_yaml(self, file_name, path_of_file=None):
         if path_of_file is None:
             path_of_file = self.config_dir
 
-        print(path_of_file)
-        print(file_name + '.yaml')
-        with open(sim_framework_path(path_of_file, file_name + '.yaml'), 'r') as stream:
-            data = yaml.safe_load(stream)
-        return data
+        path = os.path.abspath(sim_framework_path(path_of_file, file_name + '.yaml'))
+        mtime = os.stat(path).st_mtime_ns
+        entry = Config._yaml_cache.get(path)
+        if entry is None or entry[0] != mtime:
+            logger.debug('Loading %s', path)
+            with open(path, 'r') as stream:
+                data = yaml.safe_load(stream)
+            entry = (mtime, data, {})
+            Config._yaml_cache[path] = entry
+        return entry
 
     def write2dict(self, list_elems, list_name_keys):
         """
@@ -2,12 +2,58 @@ import numpy as np
 import threading
 
 
+class NoLock:
+    """
+    Drop-in replacement for threading.Lock which does nothing. The controllers use it as long as their parameters are
+    only changed from the thread executing the control loop, see :func:`Controller.enableLocking`.
+    """
+    def acquire(self, blocking=True, timeout=-1):
+        return True
+
+    def release(self):
+        return
+
+    def __enter__(self):
+        return True
+
+    def __exit__(self, *args):
+        return False
+
+
+def copy_to_robot(robot, name, value):
+    """
+    Copies a set point into the array robot.<name> without allocating a new array, unless the attribute is not an
+    array of the same shape yet. The robot never shares the array with the controller.
+
+    :param robot: instance of the robot
+    :param name: name of the attribute, e.g. 'des_joint_pos'
+    :param value: numpy array
+    :return: no return value
+    """
+    target = getattr(robot, name, None)
+    if isinstance(target, np.ndarray) and target.shape == np.shape(value) and target.dtype == np.float64:
+        np.copyto(target, value)
+    else:
+        setattr(robot, name, np.array(value, dtype=np.float64))
+
+
 class Controller:
     """
     Controller base class.
     """
     def __init__(self):
-        self.paramsLock = threading.Lock()
+        self.paramsLock = NoLock()
+
+    def enableLocking(self):
+        """
+        Protects the parameters of the controller with a lock. This has to be called if the setters (setSetPoint,
+        setGains, ...) are called from another thread than the one executing the control loop. Otherwise no lock is
+        used, as the control loop is single threaded.
+
+        :return: no return value
+        """
+        if isinstance(self.paramsLock, NoLock):
+            self.paramsLock = threading.Lock()
 
     def isFinished(self, robot):
         return False
@@ -21,6 +67,7 @@ class Controller:
     def executeController(self, robot, maxDuration=10):
         """
         Runs the simulation until the position is reached or the maximum duration is exceeded.
+        The controller is evaluated every robot.control_decimation simulation steps, the command is held in between.
 
         :param robot: instance of the robot
         :param maxDuration:
@@ -29,13 +76,17 @@ class Controller:
         robot.nextStep()
         self.initController(robot, maxDuration)
         startTime = robot.time_stamp
+        decimation = robot.control_decimation
+        step = 0
 
         while (not self.isFinished(robot)) and (robot.time_stamp - startTime < maxDuration):
 
-            controlAction = self.getControl(robot)  # dim: (num joints,)
+            if step % decimation == 0:
+                controlAction = self.getControl(robot)  # dim: (num joints,)
+                robot.command = controlAction
 
-            robot.command = controlAction
             robot.nextStep()
+            step += 1
 
 
 class TrackingController(Controller):
@@ -73,6 +124,10 @@ class JointPDController(TrackingController):
         self.desired_joint_vel = np.zeros((7,))
         self.desired_joint_acc = np.zeros((7,))
 
+        # work buffers of getControl
+        self._error = np.zeros((7,))
+        self._target_j_acc = np.zeros((7,))
+
     def isFinished(self, robot):
         return False
 
@@ -86,16 +141,23 @@ class JointPDController(TrackingController):
         - the current joint positions
 
         :param robot: instance of the robot
-        :return: target joint acceleration (num_joints, )
+        :return: target joint acceleration (num_joints, ); the array is overwritten by the next call
         """
         self.paramsLock.acquire()
-        qd_d = self.desired_joint_pos - robot.current_j_pos
-        vd_d = self.desired_joint_vel - robot.current_j_vel
-        target_j_acc = self.pgain * qd_d + self.dgain * vd_d + self.desired_joint_acc  # original
+        error = self._error
+        target_j_acc = self._target_j_acc
 
-        robot.des_joint_pos = self.desired_joint_pos.copy()
-        robot.des_joint_vel = self.desired_joint_vel.copy()
-        robot.des_joint_acc = self.desired_joint_acc.copy()
+        # pgain * (q_d - q) + dgain * (dq_d - dq) + ddq_d
+        np.subtract(self.desired_joint_pos, robot.current_j_pos, out=error)
+        np.multiply(self.pgain, error, out=target_j_acc)
+        np.subtract(self.desired_joint_vel, robot.current_j_vel, out=error)
+        error *= self.dgain
+        target_j_acc += error
+        target_j_acc += self.desired_joint_acc
+
+        copy_to_robot(robot, 'des_joint_pos', self.desired_joint_pos)
+        copy_to_robot(robot, 'des_joint_vel', self.desired_joint_vel)
+        copy_to_robot(robot, 'des_joint_acc', self.desired_joint_acc)
 
         self.paramsLock.release()
         return target_j_acc
@@ -154,6 +216,8 @@ class zeroTorqueController(TrackingController):
         self.desired_joint_vel = np.zeros((7,))
         self.desired_joint_acc = np.zeros((7,))
 
+        self._target_j_acc = np.zeros((7,))
+
     def isFinished(self, robot):
         return False
 
@@ -167,13 +231,14 @@ class zeroTorqueController(TrackingController):
         - the current joint positions
 
         :param robot: instance of the robot
-        :return: target joint acceleration (num_joints, )
+        :return: target joint acceleration (num_joints, ); the array is overwritten by the next call
         """
         self.paramsLock.acquire()
-        target_j_acc = np.zeros((7,))
+        target_j_acc = self._target_j_acc
+        target_j_acc.fill(0)
 
-        robot.des_joint_pos = self.desired_joint_pos.copy()
-        robot.des_joint_vel = self.desired_joint_vel.copy()
+        copy_to_robot(robot, 'des_joint_pos', self.desired_joint_pos)
+        copy_to_robot(robot, 'des_joint_vel', self.desired_joint_vel)
 
         self.paramsLock.release()
         return target_j_acc
@@ -225,6 +290,7 @@ class DampingController(Controller):
     def __init__(self):
         Controller.__init__(self)
         self.dgain = 0.1 * np.array([50.0, 50.0, 50.0, 50.0, 30.0, 25.0, 15.0], dtype=np.float64)
+        self._target_j_acc = np.zeros((7,))
 
     def getControl(self, robot):
         """
@@ -232,10 +298,12 @@ class DampingController(Controller):
         - the current joint velocity
 
         :param robot: instance of the robot
-        :return: target joint acceleration (num_joints, )
+        :return: target joint acceleration (num_joints, ); the array is overwritten by the next call
         """
         self.paramsLock.acquire()
-        target_j_acc = - self.dgain * robot.current_j_vel
+        target_j_acc = self._target_j_acc
+        np.multiply(self.dgain, robot.current_j_vel, out=target_j_acc)
+        np.negative(target_j_acc, out=target_j_acc)
         self.paramsLock.release()
         return target_j_acc
 
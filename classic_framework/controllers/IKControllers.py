@@ -2,7 +2,8 @@
 This module contains the inverse kinematics controller.
 """
 import numpy as np
-from classic_framework.controllers.Controller import TrackingController
+from classic_framework.controllers.Controller import TrackingController, copy_to_robot
+from classic_framework.controllers.OperationalSpace import OperationalSpaceSolver
 
 
 class CartPosController(TrackingController):
@@ -22,8 +23,8 @@ class CartPosController(TrackingController):
         self.desired_c_vel = np.zeros((3,))
         self.desired_c_acc = np.zeros((3,))
 
-        self.J_reg = 5e-6  # Jacobian regularization constant
-        self.W = np.diag([1, 1, 1, 1, 1, 1, 1])
+        # solves W J' (J W J' + reg * I)^-1 b with the Jacobian regularization constant reg and W = I
+        self.solver = OperationalSpaceSolver(reg=5e-6)
 
         # Null-space theta configuration
         self.target_th_null = np.array([3.57795216e-09,
@@ -34,6 +35,12 @@ class CartPosController(TrackingController):
                                         1.22173047e+00,
                                         7.85398126e-01])
 
+        # work buffers of getControl
+        self._error = np.zeros((3,))
+        self._target_c_acc = np.zeros((3,))
+        self._qd_null = np.zeros((7,))
+        self._qd_tmp = np.zeros((7,))
+
     def isFinished(self, robot):
         return False
 
@@ -50,28 +57,32 @@ class CartPosController(TrackingController):
         :return: target joint acceleration (num_joints, )
         """
         self.paramsLock.acquire()
-        xd_d = self.desired_c_pos - robot.current_c_pos
-        vd_d = self.desired_c_vel - robot.current_c_vel
-        target_c_acc = self.pgain * xd_d + self.dgain * vd_d + self.desired_c_acc
-
-        J = robot.getJacobian()
+        error = self._error
+        target_c_acc = self._target_c_acc
+        np.subtract(self.desired_c_pos, robot.current_c_pos, out=error)
+        np.multiply(self.pgain, error, out=target_c_acc)
+        np.subtract(self.desired_c_vel, robot.current_c_vel, out=error)
+        error *= self.dgain
+        target_c_acc += error
+        target_c_acc += self.desired_c_acc
+
+        J = robot.getCachedJacobian()
         J = J[:3, :]
-        Jw = J.dot(self.W)
-
-        # J *  W * J' + reg * I
-        JwJ_reg = Jw.dot(J.T) + self.J_reg * np.eye(3)
 
         # Null space movement
-        qd_null = self.pgain_null * (self.target_th_null - robot.current_j_pos) + self.dgain_null * (
-            -robot.current_j_vel)
+        qd_null = self._qd_null
+        np.subtract(self.target_th_null, robot.current_j_pos, out=qd_null)
+        qd_null *= self.pgain_null
+        np.multiply(self.dgain_null, robot.current_j_vel, out=self._qd_tmp)
+        qd_null -= self._qd_tmp
         # W J.T (J W J' + reg I)^-1 xd_d + (I - W J.T (J W J' + reg I)^-1 J qd_null
 
-        qd_d = np.linalg.solve(JwJ_reg, target_c_acc - J.dot(qd_null))
-        qd_d = self.W.dot(J.transpose()).dot(qd_d) + qd_null
+        qd_d = self.solver.solve(J, target_c_acc - J.dot(qd_null))
+        qd_d += qd_null
 
         # qd_d = J.transpose().dot(target_c_acc)
-        robot.des_c_pos = self.desired_c_pos
-        robot.des_c_vel = self.desired_c_vel
+        copy_to_robot(robot, 'des_c_pos', self.desired_c_pos)
+        copy_to_robot(robot, 'des_c_vel', self.desired_c_vel)
 
         self.paramsLock.release()
         return qd_d
@@ -134,8 +145,8 @@ class CartPosQuatController(TrackingController):
         self.desired_c_vel = np.zeros((7,))
         self.desired_c_acc = np.zeros((7,))
 
-        self.J_reg = 1e-2  # Jacobian regularization constant
-        self.W = np.diag([1, 1, 1, 1, 1, 1, 1])
+        # solves W J' (J W J' + reg * I)^-1 b with the Jacobian regularization constant reg and W = I
+        self.solver = OperationalSpaceSolver(reg=1e-2)
 
         # Null-space theta configuration
         self.target_th_null = np.array([3.57795216e-09,
@@ -146,21 +157,29 @@ class CartPosQuatController(TrackingController):
                                         1.22173047e+00,
                                         7.85398126e-01])
 
+        # work buffers of getControl and setSetPoint
+        self._error = np.zeros((3,))
+        self._target_c_acc = np.zeros((6,))
+        self._qd_null = np.zeros((7,))
+        self._qd_tmp = np.zeros((7,))
+        self._desired_c_pos = self.desired_c_pos
+
     def isFinished(self, robot):
         return False
 
     def initController(self, robot):
         return
 
-    def getQuaternionError(self, curr_quat, des_quat):
+    def getQuaternionError(self, curr_quat, des_quat, out=None):
         """
         Calculates the difference between the current quaternion and the desired quaternion.
 
         :param curr_quat: current quaternion
         :param des_quat: desired quaternion
+        :param out: numpy array (3,) the result is written to; if None, a new array is allocated
         :return: difference between current quaternion and desired quaternion
         """
-        quatError = np.zeros((3,))
+        quatError = np.zeros((3,)) if out is None else out
 
         quatError[0] = (curr_quat[0] * des_quat[1]
                         - des_quat[0] * curr_quat[1]
@@ -181,31 +200,41 @@ class CartPosQuatController(TrackingController):
 
     def getControl(self, robot):
         self.paramsLock.acquire()
-        qd_d = self.desired_c_pos[:3] - robot.current_c_pos
-        vd_d = self.desired_c_vel[:3] - robot.current_c_vel
-
-        target_cpos_acc = self.pgain[:3] * qd_d + self.dgain[:3] * vd_d + self.desired_c_acc[:3]
-        target_cquat = self.pgain[3:] * self.getQuaternionError(robot.current_c_quat, self.desired_c_pos[3:]) + \
-                       self.dgain[3:] * (self.desired_c_vel[3:] - robot.current_c_quat_vel)[1:] + self.desired_c_acc[4:]
+        error = self._error
+        target_c_acc = self._target_c_acc
+        target_cpos_acc = target_c_acc[:3]
+        target_cquat = target_c_acc[3:]
+
+        # position: pgain * (x_d - x) + dgain * (dx_d - dx) + ddx_d
+        np.subtract(self.desired_c_pos[:3], robot.current_c_pos, out=error)
+        np.multiply(self.pgain[:3], error, out=target_cpos_acc)
+        np.subtract(self.desired_c_vel[:3], robot.current_c_vel, out=error)
+        error *= self.dgain[:3]
+        target_cpos_acc += error
+        target_cpos_acc += self.desired_c_acc[:3]
+
+        # orientation: pgain * quat_error + dgain * (dquat_d - dquat)[1:] + ddquat_d[1:]
+        self.getQuaternionError(robot.current_c_quat, self.desired_c_pos[3:], out=error)
+        np.multiply(self.pgain[3:], error, out=target_cquat)
+        np.subtract(self.desired_c_vel[4:], robot.current_c_quat_vel[1:], out=error)
+        error *= self.dgain[3:]
+        target_cquat += error
+        target_cquat += self.desired_c_acc[4:]
 
         # target_cquat = self.pgain[3:] * self.getQuaternionError(robot.current_c_quat, self.desired_c_pos[3:]) + self.desired_c_acc[4:]
 
-        target_c_acc = np.hstack((target_cpos_acc, target_cquat))
-
-        J = robot.getJacobian()
-
-        Jw = J.dot(self.W)
-
-        # J *  W * J' + reg * I
-        JwJ_reg = Jw.dot(J.T) + self.J_reg * np.eye(J.shape[0])
+        J = robot.getCachedJacobian()
 
         # Null space movement
-        qd_null = self.pgain_null * (self.target_th_null - robot.current_j_pos) + self.dgain_null * (
-            -robot.current_j_vel)
+        qd_null = self._qd_null
+        np.subtract(self.target_th_null, robot.current_j_pos, out=qd_null)
+        qd_null *= self.pgain_null
+        np.multiply(self.dgain_null, robot.current_j_vel, out=self._qd_tmp)
+        qd_null -= self._qd_tmp
 
         # W J.T (J W J' + reg I)^-1 xd_d + (I - W J.T (J W J' + reg I)^-1 J qd_null
-        qd_d = np.linalg.solve(JwJ_reg, target_c_acc - J.dot(qd_null))
-        qd_d = self.W.dot(J.transpose()).dot(qd_d) + qd_null
+        qd_d = self.solver.solve(J, target_c_acc - J.dot(qd_null))
+        qd_d += qd_null
 
         #print('target_c: ', target_c_acc)
         #print('dq: ', qd_d)
@@ -214,10 +243,10 @@ class CartPosQuatController(TrackingController):
 
         #qd_d = J_.transpose().dot(target_c_acc)
 
-        robot.des_c_pos = self.desired_c_pos[:3]
-        robot.des_c_vel = self.desired_c_vel[:3]
-        robot.des_quat = self.desired_c_pos[3:]
-        robot.des_quat_vel = self.desired_c_vel[3:]
+        copy_to_robot(robot, 'des_c_pos', self.desired_c_pos[:3])
+        copy_to_robot(robot, 'des_c_vel', self.desired_c_vel[:3])
+        copy_to_robot(robot, 'des_quat', self.desired_c_pos[3:])
+        copy_to_robot(robot, 'des_quat_vel', self.desired_c_vel[3:])
 
         self.paramsLock.release()
         return qd_d
@@ -245,8 +274,10 @@ class CartPosQuatController(TrackingController):
         :return: no return value
         """
         self.paramsLock.acquire()
-        self.desired_c_pos = desired_pos.copy()
-        self.desired_c_pos[3:] = self.desired_c_pos[3:] / np.linalg.norm(self.desired_c_pos[3:])
+        # copied (and normalized) into the own buffer, such that the given array is not modified
+        np.copyto(self._desired_c_pos, desired_pos)
+        self._desired_c_pos[3:] /= np.linalg.norm(self._desired_c_pos[3:])
+        self.desired_c_pos = self._desired_c_pos
         if desired_vel is not None:
             self.desired_c_vel = desired_vel
         if desired_acc is not None:
@@ -0,0 +1,73 @@
+"""
+This module contains the regularized least squares solver of the operational space controllers.
+"""
+import numpy as np
+from scipy.linalg import cho_factor, cho_solve
+
+
+class OperationalSpaceSolver:
+    """
+    Maps a task space target b to the joint space via x = W J' (J W J' + reg * I)^-1 b, where W is a diagonal joint
+    weighting (skipped if it is the identity).
+
+    J W J' + reg * I is symmetric positive definite for reg > 0, so it is factorized with a Cholesky decomposition
+    instead of a general LU solve. The factorization is reused as long as the entries of the Jacobian change by less
+    than reuseTolerance. With the default tolerance of 0 it is only reused for an unchanged Jacobian, e.g. if several
+    targets are solved for the Jacobian of one time step.
+    """
+
+    def __init__(self, reg, weights=None, reuseTolerance=0.0):
+        """
+        :param reg: regularization constant (> 0)
+        :param weights: numpy array (num_joints,) with the diagonal of W, None for the identity
+        :param reuseTolerance: maximal absolute change of a Jacobian entry for which the factorization is reused
+        """
+        self.reg = reg
+        self.weights = weights
+        self.reuseTolerance = reuseTolerance
+
+        self._J = None
+        self._factor = None
+        self._factorReg = None
+        self._factorWeights = None
+
+    def factorize(self, J):
+        """
+        Returns the Cholesky factorization of J W J' + reg * I, computing it only if the Jacobian changed by more than
+        reuseTolerance (or the regularization / weighting changed) since the last factorization.
+
+        :param J: jacobian matrix (task_dim, num_joints)
+        :return: factorization as returned by scipy.linalg.cho_factor
+        """
+        if self._factor is None or self._factorReg != self.reg or self._factorWeights is not self.weights or \
+                self._J.shape != J.shape or np.max(np.abs(J - self._J)) > self.reuseTolerance:
+            Jw = J if self.weights is None else J * self.weights
+            A = Jw.dot(J.T)
+            A.flat[::A.shape[0] + 1] += self.reg
+            self._factor = cho_factor(A, check_finite=False)
+            self._factorReg = self.reg
+            self._factorWeights = self.weights
+            self._J = np.array(J, copy=True)
+        return self._factor
+
+    def solve(self, J, b):
+        """
+        :param J: jacobian matrix (task_dim, num_joints)
+        :param b: task space target (task_dim,)
+        :return: W J' (J W J' + reg * I)^-1 b, numpy array (num_joints,)
+        """
+        x = J.T.dot(cho_solve(self.factorize(J), b, check_finite=False))
+        if self.weights is not None:
+            x *= self.weights
+        return x
+
+    def reset(self):
+        """
+        Discards the stored factorization. Needed if the weights were modified in place.
+
+        :return: no return value
+        """
+        self._J = None
+        self._factor = None
+        self._factorReg = None
+        self._factorWeights = None
@@ -0,0 +1,227 @@
+"""
+This module contains trajectory objects which evaluate position, velocity and acceleration for all dimensions of a
+set point at once, at arbitrary times.
+"""
+import numpy as np
+
+
+class Trajectory:
+    """
+    Base class for trajectories which are evaluated on demand. Times are relative to the start of the trajectory.
+    """
+
+    duration = 0.0
+
+    @property
+    def dim(self):
+        raise NotImplementedError
+
+    def evaluate(self, t):
+        """
+        Evaluates the trajectory at the given times.
+
+        :param t: scalar or numpy array [num_time_stamps,] with times relative to the start of the trajectory
+        :return: position, velocity and acceleration; numpy arrays [num_time_stamps, dim] (or [dim,] for scalar t)
+        """
+        raise NotImplementedError
+
+    def evaluateInto(self, t, pos, vel, acc):
+        """
+        Evaluates the trajectory at a single time and writes the result into the given arrays. Used in the control
+        loop, where it avoids allocating new arrays in every time step.
+
+        :param t: time relative to the start of the trajectory
+        :param pos: numpy array [dim,] for the position
+        :param vel: numpy array [dim,] for the velocity
+        :param acc: numpy array [dim,] for the acceleration
+        :return: no return value
+        """
+        pos[:], vel[:], acc[:] = self.evaluate(t)
+
+    def sample(self, dt):
+        """
+        Evaluates the trajectory on a grid with step size dt from 0 up to (and including) the duration.
+
+        :param dt: step size of the grid
+        :return: position, velocity and acceleration; numpy arrays [num_time_stamps, dim]
+        """
+        time = np.arange(int(np.round(self.duration / dt)) + 1) * dt
+        return self.evaluate(time)
+
+
+class SampledTrajectory(Trajectory):
+    """
+    Trajectory given by positions sampled with a fixed step size dt. It is evaluated at the sample closest to the
+    requested time. Velocities and accelerations which are not given are computed by finite differences of the
+    neighbouring samples when they are requested, so no additional [num_time_stamps, dim] arrays are stored. At the
+    end of the trajectory (where the finite differences are not defined) they are 0.
+    """
+
+    def __init__(self, positions, dt, velocities=None, accelerations=None):
+        """
+        :param positions: numpy array [num_time_stamps, dim]
+        :param dt: step size between two samples
+        :param velocities: numpy array [num_time_stamps, dim] or None
+        :param accelerations: numpy array [num_time_stamps, dim] or None
+        """
+        self.positions = positions
+        self.velocities = velocities
+        self.accelerations = accelerations
+        self.dt = dt
+        self.duration = positions.shape[0] * dt
+
+    @property
+    def dim(self):
+        return self.positions.shape[1]
+
+    def evaluate(self, t):
+        t = np.asarray(t, dtype=np.float64)
+        scalar = t.ndim == 0
+        idx = np.clip(np.round(t.reshape(-1) / self.dt), 0, self.positions.shape[0] - 1).astype(np.int64)
+
+        pos = self.positions[idx, :]
+        vel = self._derivative(idx, 1, self.velocities)
+        acc = self._derivative(idx, 2, self.accelerations)
+
+        if scalar:
+            return pos[0], vel[0], acc[0]
+        return pos, vel, acc
+
+    def evaluateInto(self, t, pos, vel, acc):
+        num_samples = self.positions.shape[0]
+        idx = int(min(max(round(t / self.dt), 0), num_samples - 1))
+
+        pos[:] = self.positions[idx, :]
+        self._derivativeInto(idx, 1, self.velocities, vel)
+        self._derivativeInto(idx, 2, self.accelerations, acc)
+
+    def sample(self, dt=None):
+        """
+        Returns the samples of the trajectory. If dt differs from the step size of the trajectory, it is resampled.
+
+        :param dt: step size of the grid, None for the step size of the trajectory
+        :return: position, velocity and acceleration; numpy arrays [num_time_stamps, dim]
+        """
+        if dt is not None and dt != self.dt:
+            return super().sample(dt)
+
+        vel = self.velocities
+        if vel is None:
+            vel = np.diff(self.positions, 1, axis=0) / self.dt
+        acc = self.accelerations
+        if acc is None:
+            acc = np.diff(self.positions, 2, axis=0) / (self.dt ** 2)
+        return self.positions, vel, acc
+
+    def _derivative(self, idx, order, values):
+        out = np.zeros((idx.shape[0], self.dim))
+        if values is not None:
+            valid = idx < values.shape[0]
+            out[valid] = values[idx[valid], :]
+            return out
+
+        valid = idx < self.positions.shape[0] - order
+        i = idx[valid]
+        p = self.positions
+        if order == 1:
+            out[valid] = (p[i + 1] - p[i]) / self.dt
+        else:
+            out[valid] = (p[i + 2] - 2 * p[i + 1] + p[i]) / (self.dt ** 2)
+        return out
+
+    def _derivativeInto(self, idx, order, values, out):
+        if values is not None:
+            if idx < values.shape[0]:
+                out[:] = values[idx, :]
+            else:
+                out.fill(0)
+        elif idx < self.positions.shape[0] - order:
+            p = self.positions
+            if order == 1:
+                np.subtract(p[idx + 1], p[idx], out=out)
+                out /= self.dt
+            else:
+                np.subtract(p[idx + 2], p[idx + 1], out=out)
+                out -= p[idx + 1]
+                out += p[idx]
+                out /= self.dt ** 2
+        else:
+            out.fill(0)
+
+
+class QuinticTrajectory(Trajectory):
+    """
+    Point to point trajectory with zero velocity and acceleration at both boundaries (minimum jerk profile).
+
+    Each dimension follows start + (goal - start) * s(t / duration) with the quintic s(x) = 10x^3 - 15x^4 + 6x^5, which
+    is the same polynomial as a degree 5 B-spline through the two boundary points with vanishing 1st and 2nd order
+    derivatives. Velocity and acceleration are computed analytically from the derivatives of s.
+    """
+
+    def __init__(self, start, goal, duration):
+        """
+        :param start: numpy array [dim,] with the start position
+        :param goal: numpy array [dim,] with the goal position
+        :param duration: duration of the movement in seconds
+        """
+        self.start = np.array(start, dtype=np.float64).reshape(-1)
+        self.goal = np.array(goal, dtype=np.float64).reshape(-1)
+        if self.start.shape != self.goal.shape:
+            raise ValueError("Error, start and goal of the trajectory have different dimensions " +
+                             str(self.start.shape) + " and " + str(self.goal.shape) + ".")
+        self.delta = self.goal - self.start
+        self.duration = float(duration)
+
+    @property
+    def dim(self):
+        return self.start.shape[0]
+
+    def evaluate(self, t):
+        """
+        Evaluates the trajectory at the given times. Times outside of [0, duration] are clamped, i.e. the trajectory
+        rests at the start and goal position.
+
+        :param t: scalar or numpy array [num_time_stamps,] with times relative to the start of the trajectory
+        :return: position, velocity and acceleration; numpy arrays [num_time_stamps, dim] (or [dim,] for scalar t)
+        """
+        t = np.asarray(t, dtype=np.float64)
+        scalar = t.ndim == 0
+        t = t.reshape(-1)
+
+        if self.duration <= 0:
+            pos = np.tile(self.goal, (t.shape[0], 1))
+            vel = np.zeros_like(pos)
+            acc = np.zeros_like(pos)
+        else:
+            x = np.clip(t / self.duration, 0.0, 1.0)
+            x2 = x * x
+            x3 = x2 * x
+            s = x3 * (10.0 - 15.0 * x + 6.0 * x2)
+            ds = 30.0 * x2 * (1.0 - 2.0 * x + x2) / self.duration
+            dds = 60.0 * x * (1.0 - 3.0 * x + 2.0 * x2) / self.duration ** 2
+
+            pos = self.start + np.outer(s, self.delta)
+            vel = np.outer(ds, self.delta)
+            acc = np.outer(dds, self.delta)
+
+        if scalar:
+            return pos[0], vel[0], acc[0]
+        return pos, vel, acc
+
+    def evaluateInto(self, t, pos, vel, acc):
+        if self.duration <= 0:
+            pos[:] = self.goal
+            vel.fill(0)
+            acc.fill(0)
+            return
+
+        x = min(max(t / self.duration, 0.0), 1.0)
+        x2 = x * x
+        s = x2 * x * (10.0 - 15.0 * x + 6.0 * x2)
+        ds = 30.0 * x2 * (1.0 - 2.0 * x + x2) / self.duration
+        dds = 60.0 * x * (1.0 - 3.0 * x + 2.0 * x2) / self.duration ** 2
+
+        np.multiply(self.delta, s, out=pos)
+        pos += self.start
+        np.multiply(self.delta, ds, out=vel)
+        np.multiply(self.delta, dds, out=acc)
@@ -3,8 +3,7 @@ This module uses a controller and a desired position to calculate the trajectory
 """
 from classic_framework.controllers.IKControllers import *
 from classic_framework.controllers.Controller import *
-
-from scipy.interpolate import make_interp_spline
+from classic_framework.controllers.TrajectoryGeneration import Trajectory, SampledTrajectory, QuinticTrajectory
 
 
 class TrajectoryTracker(Controller):
@@ -16,12 +15,39 @@ class TrajectoryTracker(Controller):
 
         self.startingTime = None
         self.trackingController = tracker
-        self.trajectory = None
-        self.trajectoryVel = None
-        self.trajectoryAcc = None
+        self.reference = None  # Trajectory object evaluated in getControl
+        self._samples = None
+        self._setPoint = None  # buffers for position, velocity and acceleration of the current set point
         self.dt = dt
         self.additionalDuration = 0
 
+    @property
+    def trajectory(self):
+        """
+        Positions of the reference trajectory sampled with dt, numpy array (num_time_stamps, num_joints) or None.
+        For analytic trajectories the samples are only created when this property is accessed.
+        """
+        return self._getSamples()[0]
+
+    @property
+    def trajectoryVel(self):
+        return self._getSamples()[1]
+
+    @property
+    def trajectoryAcc(self):
+        return self._getSamples()[2]
+
+    def _getSamples(self):
+        if self.reference is None:
+            return None, None, None
+        if self._samples is None:
+            self._samples = self.reference.sample(self.dt)
+        return self._samples
+
+    def enableLocking(self):
+        Controller.enableLocking(self)
+        self.trackingController.enableLocking()
+
     def isFinished(self, robot):
         """
         Checks if the robot is finished performing an action.
@@ -46,42 +72,39 @@ class TrajectoryTracker(Controller):
         self.duration = maxDuration
 
     def getControl(self, robot):
-        if self.trajectory is None:
+        if self.reference is None:
             print('Error: Trajectory is empty')
 
         self.paramsLock.acquire()
 
-        timeStep = np.round((robot.time_stamp - self.startingTime) / self.dt)
-        timeStep = int(np.min([timeStep, self.trajectory.shape[0] - 1]))
-
-        desired_pos = self.trajectory[timeStep, :]
-
-        if timeStep < self.trajectory.shape[0] - 1:
-            desired_vel = self.trajectoryVel[timeStep, :]
-        else:
-            desired_vel = np.zeros((self.trajectory.shape[1],))
-
-        if timeStep < self.trajectory.shape[0] - 2:
-            desired_acc = self.trajectoryAcc[timeStep, :]
-        else:
-            desired_acc = np.zeros((self.trajectory.shape[1],))
+        # evaluated at the actual time, which does not have to lie on the sampling grid of the trajectory
+        desired_pos, desired_vel, desired_acc = self._setPoint
+        self.reference.evaluateInto(robot.time_stamp - self.startingTime, desired_pos, desired_vel, desired_acc)
 
         self.trackingController.setSetPoint(desired_pos, desired_vel, desired_acc)
         self.paramsLock.release()
 
         return self.trackingController.getControl(robot)
 
-    def setTrajectory(self, trajectory):
+    def setTrajectory(self, trajectory, trajectoryVel=None, trajectoryAcc=None):
         """
-        Set the trajectory from splines.
-        :param trajectory: numpy array (num_time_stamps, num_joints)
+        Set the reference trajectory. Velocities and accelerations of sampled trajectories which are not given are
+        computed by finite differences of the trajectory.
+
+        :param trajectory: :class:`Trajectory` object or numpy array (num_time_stamps, num_joints) sampled with dt
+        :param trajectoryVel: numpy array (num_time_stamps, num_joints) with the velocities along the trajectory
+        :param trajectoryAcc: numpy array (num_time_stamps, num_joints) with the accelerations along the trajectory
         :return: no return value
         """
+        if not isinstance(trajectory, Trajectory):
+            trajectory = SampledTrajectory(trajectory, self.dt, trajectoryVel, trajectoryAcc)
+
         self.paramsLock.acquire()
 
-        self.trajectory = trajectory
-        self.trajectoryVel = np.diff(trajectory, 1, axis=0) / self.dt
-        self.trajectoryAcc = np.diff(trajectory, 2, axis=0) / (self.dt ** 2)
+        self.reference = trajectory
+        self._samples = None
+        if self._setPoint is None or self._setPoint[0].shape[0] != trajectory.dim:
+            self._setPoint = tuple(np.zeros(trajectory.dim) for _ in range(3))
 
         self.paramsLock.release()
 
@@ -93,6 +116,29 @@ class JointTrajectoryTracker(TrajectoryTracker):
     def __init__(self, dt):
         TrajectoryTracker.__init__(self, JointPDController(), dt)
 
+    def executeFastForward(self, robot, maxDuration, blockSize=100):
+        """
+        Headless variant of :func:`executeController`. The set points of blockSize time steps are evaluated at once
+        and passed to robot.advanceJointTrajectory, which simulates the whole block with the joint PD controller and
+        only receives (and logs / renders) the robot state at the end of the block.
+
+        :param robot: instance of the robot, has to implement advanceJointTrajectory (e.g. MujocoRobot)
+        :param maxDuration: duration of the execution
+        :param blockSize: number of time steps simulated per block
+        :return: no return value
+        """
+        robot.nextStep()
+        self.initController(robot, maxDuration)
+        startTime = robot.time_stamp
+        numSteps = int(np.ceil(np.round(maxDuration / robot.dt, 6)))
+
+        for blockStart in range(0, numSteps, blockSize):
+            numBlockSteps = min(blockSize, numSteps - blockStart)
+            time = robot.time_stamp - startTime + np.arange(numBlockSteps) * robot.dt
+            desired_pos, desired_vel, desired_acc = self.reference.evaluate(time)
+            robot.advanceJointTrajectory(desired_pos, desired_vel, desired_acc,
+                                         self.trackingController.pgain, self.trackingController.dgain)
+
 
 class CartPosTrajectoryTracker(TrajectoryTracker):
     """
@@ -131,8 +177,8 @@ class GotoController(TrajectoryTracker):
 
     def initController(self, robot, maxDuration, fingerController = False):         # param called for choosing, if we want to use last point of spline ( if existing ) for planning the new spline
         """
-        This method calls :func:`setTrajectory` and and sets the robot trajectory as [num_timesteps x num_joints].
-        The number of time stamps is calculated by maxDuration / 1e-3 (i.e. 1kHz sampling).
+        This method calls :func:`setTrajectory` with a quintic trajectory from the current (or last desired) position
+        to the desired position, which is evaluated at the robot time stamps while the controller is executed.
 
         :param robot: instance of the robot
         :param maxDuration: sets the number of time stamps
@@ -141,14 +187,11 @@ class GotoController(TrajectoryTracker):
         """
         super().initController(robot, maxDuration)
 
-        time = np.linspace(0, self.duration, int(self.duration / self.dt))  # create time stamp array
-        trajectory = np.zeros((time.shape[0], self.trackingController.dimSetPoint))  # create empty trajectory array
-
         called = robot.smooth_spline
 
         if called:
             try:
-                if self.trajectory is None:
+                if self.reference is None:
                     print('first time creating spline: using current position as starting position')
                     cur_state = self.trackingController.getCurrentPos(robot)
                 else:
@@ -161,16 +204,10 @@ class GotoController(TrajectoryTracker):
             print(' using current position for setting starting position of current spline')
             cur_state = self.trackingController.getCurrentPos(robot)
 
-        for i in range(self.trackingController.dimSetPoint):
-            # This creates a b spline with 0 1st and 2nd order derivatives at the boundaries
-            l, r = [(1, 0.0), (2, 0.0)], [(1, 0.0), (2, 0.0)]
-            bsplinef = make_interp_spline(x=[0, self.duration],
-                                          y=[cur_state[i], self.desiredPosition[i]],
-                                          bc_type=(l, r),
-                                          k=5)
-            trajectory[:, i] = bsplinef(time)
-
-        self.setTrajectory(trajectory)  # sets trajectory with [num_timesteps x num_joints] from splines
+        # quintic with 0 1st and 2nd order derivatives at the boundaries, evaluated on demand in getControl
+        dim = self.trackingController.dimSetPoint
+        self.setTrajectory(QuinticTrajectory(np.asarray(cur_state)[:dim], np.asarray(self.desiredPosition)[:dim],
+                                             self.duration))
 
     def setDesiredPos(self, desiredPosition):
         """
@@ -189,7 +226,8 @@ class GotoController(TrajectoryTracker):
         """
         Sets the trajectory object to None (used if we expect discontinuities)
         """
-        self.trajectory = None
+        self.reference = None
+        self._samples = None
 
     def getSetPosFromRobot(self, robot):
         return robot.des_joint_pos
@@ -229,22 +267,30 @@ class GotoCartPosQuatPlanningController(GotoController):
         GotoController.__init__(self, JointPDController(), dt)
         self.desiredTaskPosition = np.zeros(7,)
         from classic_framework.interface.FictiveRobot import FictiveRobot
+        from classic_framework.interface.IKCache import IKCache
         self.fictive_robot = FictiveRobot(init_j_pos=np.zeros((7,)), dt=self.dt, offset=np.zeros(3))
+        # goto targets are often repeated, e.g. grid positions. The solutions are keyed on the current joint positions,
+        # such that the redundancy of the robot is resolved as when planning from the current configuration.
+        self.fictive_robot.ikCache = IKCache(seedResolution=0.05)
+        self.ikTolerance = 1e-3  # if the inverse kinematics does not reach this tolerance, the fictive robot is simulated
 
     def initController(self, robot, maxDuration, fingerController=False):
 
         self.fictive_robot.init_j_pos = robot.current_j_pos.copy()
         self.fictive_robot.time_stamp = 0
 
-        self.fictive_robot.gotoCartPositionAndQuat(self.desiredTaskPosition[:3], self.desiredTaskPosition[3:],
-                                                   duration=maxDuration)
-
-        des_joints = self.fictive_robot.current_j_pos
+        des_joints, residual = self.fictive_robot.inverseKinematics(self.desiredTaskPosition,
+                                                                    q_init=self.fictive_robot.init_j_pos)
+        if residual > self.ikTolerance:
+            print('inverse kinematics did not converge (residual ' + str(residual) + '), simulating the fictive robot')
+            self.fictive_robot.gotoCartPositionAndQuat(self.desiredTaskPosition[:3], self.desiredTaskPosition[3:],
+                                                       duration=maxDuration)
+            des_joints = self.fictive_robot.current_j_pos
 
 
-        data = robot.config.load_yaml('PD_control_gains')
-        pgain = np.array(data['pgain'], dtype=np.float64)
-        dgain = np.array(data['dgain'], dtype=np.float64)
+        data = robot.config.load_gains('PD_control_gains')
+        pgain = data['pgain']
+        dgain = data['dgain']
         self.trackingController.pgain = pgain
         self.trackingController.dgain = dgain
 
@@ -6,4 +6,6 @@
 from .Config import *
 from .Controller import *
 from .IKControllers import *
+from .OperationalSpace import *
+from .TrajectoryGeneration import *
 from .TrajectoryTracking import *
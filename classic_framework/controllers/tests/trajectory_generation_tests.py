@@ -0,0 +1,150 @@
+import numpy as np
+from scipy.interpolate import make_interp_spline
+from unittest import TestCase
+
+from classic_framework.controllers.TrajectoryGeneration import QuinticTrajectory, SampledTrajectory
+
+
+def assertEvaluateIntoMatches(test, trajectory, times):
+    pos = np.zeros(trajectory.dim)
+    vel = np.zeros(trajectory.dim)
+    acc = np.zeros(trajectory.dim)
+    for t in times:
+        trajectory.evaluateInto(t, pos, vel, acc)
+        exp_pos, exp_vel, exp_acc = trajectory.evaluate(t)
+        np.testing.assert_allclose(pos, exp_pos, atol=1e-12, err_msg='position at t = ' + str(t))
+        np.testing.assert_allclose(vel, exp_vel, atol=1e-12, err_msg='velocity at t = ' + str(t))
+        np.testing.assert_allclose(acc, exp_acc, atol=1e-12, err_msg='acceleration at t = ' + str(t))
+
+
+class TestQuinticTrajectory(TestCase):
+    def setUp(self) -> None:
+        self.start = np.array([0.1, -0.5, 1.0])
+        self.goal = np.array([0.6, 0.5, 0.2])
+        self.trajectory = QuinticTrajectory(self.start, self.goal, duration=2.0)
+
+    def testBoundaryConditions(self):
+        pos, vel, acc = self.trajectory.evaluate(np.array([0.0, 2.0]))
+        np.testing.assert_allclose(pos, [self.start, self.goal])
+        np.testing.assert_allclose(vel, 0, atol=1e-12)
+        np.testing.assert_allclose(acc, 0, atol=1e-12)
+
+    def testClampedOutsideDuration(self):
+        pos, vel, acc = self.trajectory.evaluate(np.array([-1.0, 3.0, 100.0]))
+        np.testing.assert_allclose(pos, [self.start, self.goal, self.goal])
+        np.testing.assert_array_equal(vel, 0)
+        np.testing.assert_array_equal(acc, 0)
+
+    def testMidpoint(self):
+        pos, vel, _ = self.trajectory.evaluate(1.0)
+        np.testing.assert_allclose(pos, (self.start + self.goal) / 2)
+        # maximal velocity of the minimum jerk profile is 15 / 8 * delta / duration
+        np.testing.assert_allclose(vel, 15 / 8 * (self.goal - self.start) / 2.0)
+
+    def testMatchesBSpline(self):
+        # the GotoController used to interpolate with this spline
+        times = np.linspace(0, 2.0, 41)
+        pos, vel, acc = self.trajectory.evaluate(times)
+        for i in range(3):
+            l, r = [(1, 0.0), (2, 0.0)], [(1, 0.0), (2, 0.0)]
+            bsplinef = make_interp_spline(x=[0, 2.0], y=[self.start[i], self.goal[i]], bc_type=(l, r), k=5)
+            np.testing.assert_allclose(pos[:, i], bsplinef(times), atol=1e-12)
+            np.testing.assert_allclose(vel[:, i], bsplinef(times, 1), atol=1e-10)
+            np.testing.assert_allclose(acc[:, i], bsplinef(times, 2), atol=1e-10)
+
+    def testNumericalDerivatives(self):
+        h = 1e-5
+        times = np.linspace(0.05, 1.95, 20)
+        pos, vel, acc = self.trajectory.evaluate(times)
+        pos_plus, vel_plus, _ = self.trajectory.evaluate(times + h)
+        pos_minus, vel_minus, _ = self.trajectory.evaluate(times - h)
+        np.testing.assert_allclose(vel, (pos_plus - pos_minus) / (2 * h), atol=1e-6)
+        np.testing.assert_allclose(acc, (vel_plus - vel_minus) / (2 * h), atol=1e-5)
+
+    def testShapes(self):
+        pos, vel, acc = self.trajectory.evaluate(0.3)
+        self.assertEqual(pos.shape, (3,))
+        pos, vel, acc = self.trajectory.sample(0.1)
+        self.assertEqual(pos.shape, (21, 3))
+        self.assertEqual(self.trajectory.dim, 3)
+
+    def testEvaluateInto(self):
+        assertEvaluateIntoMatches(self, self.trajectory, [-0.5, 0.0, 0.37, 1.0, 1.999, 2.0, 2.5, 10.0])
+
+    def testZeroDuration(self):
+        trajectory = QuinticTrajectory(self.start, self.goal, duration=0.0)
+        pos, vel, acc = trajectory.evaluate(np.array([0.0, 1.0]))
+        np.testing.assert_array_equal(pos, [self.goal, self.goal])
+        np.testing.assert_array_equal(vel, 0)
+        assertEvaluateIntoMatches(self, trajectory, [0.0, 1.0])
+
+    def testDimensionMismatch(self):
+        with self.assertRaises(ValueError):
+            QuinticTrajectory(np.zeros(3), np.zeros(2), duration=1.0)
+
+
+class TestSampledTrajectory(TestCase):
+    def setUp(self) -> None:
+        self.dt = 0.01
+        self.time = np.arange(50) * self.dt
+        self.positions = np.stack((np.sin(self.time), self.time ** 2, np.ones_like(self.time)), axis=1)
+        self.trajectory = SampledTrajectory(self.positions, self.dt)
+
+    def testSamples(self):
+        pos, vel, acc = self.trajectory.evaluate(self.time)
+        np.testing.assert_array_equal(pos, self.positions)
+        # forward differences as np.diff, zero where they are not defined at the end of the trajectory
+        np.testing.assert_allclose(vel[:-1], np.diff(self.positions, 1, axis=0) / self.dt)
+        np.testing.assert_array_equal(vel[-1], 0)
+        np.testing.assert_allclose(acc[:-2], np.diff(self.positions, 2, axis=0) / self.dt ** 2)
+        np.testing.assert_array_equal(acc[-2:], 0)
+
+    def testNearestSample(self):
+        pos, _, __ = self.trajectory.evaluate(np.array([0.0149, 0.0151, 0.2]))
+        np.testing.assert_array_equal(pos, self.positions[[1, 2, 20]])
+
+    def testClamped(self):
+        pos, vel, acc = self.trajectory.evaluate(np.array([-1.0, self.trajectory.duration, 10.0]))
+        np.testing.assert_array_equal(pos, self.positions[[0, -1, -1]])
+        np.testing.assert_allclose(vel[0], (self.positions[1] - self.positions[0]) / self.dt)
+        np.testing.assert_array_equal(vel[1:], 0)
+        np.testing.assert_array_equal(acc[1:], 0)
+
+    def testNumericalDerivatives(self):
+        _, vel, acc = self.trajectory.evaluate(self.time[:-2])
+        t = self.time[:-2]
+        # forward differences are first order accurate
+        np.testing.assert_allclose(vel[:, 0], np.cos(t), atol=self.dt)
+        np.testing.assert_allclose(vel[:, 1], 2 * t, atol=2 * self.dt)
+        np.testing.assert_allclose(acc[:, 0], -np.sin(t), atol=2 * self.dt)
+        np.testing.assert_allclose(acc[:, 1], 2, atol=1e-8)
+        np.testing.assert_array_equal(vel[:, 2], 0)
+
+    def testGivenDerivatives(self):
+        velocities = np.diff(self.positions, 1, axis=0) / self.dt
+        accelerations = np.diff(self.positions, 2, axis=0) / self.dt ** 2
+        trajectory = SampledTrajectory(self.positions, self.dt, velocities, accelerations)
+        _, vel, acc = trajectory.evaluate(self.time)
+        _, exp_vel, exp_acc = self.trajectory.evaluate(self.time)
+        np.testing.assert_allclose(vel, exp_vel)
+        np.testing.assert_allclose(acc, exp_acc)
+        assertEvaluateIntoMatches(self, trajectory, [-0.1, 0.0, 0.123, 0.48, 0.49, 0.5, 1.0])
+
+    def testSample(self):
+        pos, vel, acc = self.trajectory.sample()
+        self.assertIs(pos, self.positions)
+        np.testing.assert_allclose(vel, np.diff(self.positions, 1, axis=0) / self.dt)
+        np.testing.assert_allclose(acc, np.diff(self.positions, 2, axis=0) / self.dt ** 2)
+
+        # resampling covers [0, duration] with duration = num_samples * dt, the last grid point is clamped
+        pos, _, __ = self.trajectory.sample(2 * self.dt)
+        np.testing.assert_array_equal(pos[:-1], self.positions[::2])
+        np.testing.assert_array_equal(pos[-1], self.positions[-1])
+
+    def testScalarTime(self):
+        pos, vel, acc = self.trajectory.evaluate(0.1)
+        self.assertEqual(pos.shape, (3,))
+        np.testing.assert_array_equal(pos, self.positions[10])
+
+    def testEvaluateInto(self):
+        assertEvaluateIntoMatches(self, self.trajectory, [-0.1, 0.0, 0.123, 0.47, 0.48, 0.49, 0.5, 1.0])
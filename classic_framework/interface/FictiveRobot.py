@@ -3,6 +3,7 @@ import pinocchio
 
 from classic_framework import GotoCartPosImpedanceController
 from classic_framework import GotoCartPosQuatImpedanceController
+from classic_framework.controllers.OperationalSpace import OperationalSpaceSolver
 from classic_framework.controllers.TrajectoryTracking import GotoJointController
 from classic_framework.controllers.TrajectoryTracking import JointTrajectoryTracker
 from classic_framework.interface.Robots import RobotBase
@@ -19,6 +20,8 @@ class FictiveRobot(RobotBase):
         obj_urdf = sim_framework_path("./envs/panda_arm_hand_pinocchio.urdf")
         self.model = pinocchio.buildModelFromUrdf(obj_urdf)
         self.data = self.model.createData()
+        self._ik_data = self.model.createData()  # separate data, such that inverseKinematics keeps the robot state
+        self.ikCache = None  # optional IKCache for the solutions of inverseKinematics
         # The offset is [0, 0, 0.88] for pybullet (with the table)
         # The offset is [0, 0, 0] for mujoco (with current scene)
         # NOTE: adjust the offset (z-direction), if you re-place the robot! (Use check offset function of fictive robot)
@@ -59,6 +62,92 @@ class FictiveRobot(RobotBase):
                                           self.end_effector_frame_id,
                                           pinocchio.LOCAL_WORLD_ALIGNED)[:, :7]
 
+    def inverseKinematics(self, targets, q_init=None, maxIter=100, tol=1e-4, damping=1e-4, stepSize=1.0):
+        """
+        Computes joint configurations for end effector poses with damped least squares (Levenberg-Marquardt) steps
+        q <- q + J' (J J' + damping * I)^-1 e, where e stacks the position error and the orientation error (the
+        quaternion error of the CartPosQuatController, scaled to radians). The iteration stops as soon as the norm of
+        e is below tol. The joints are clipped to the position limits of the model.
+
+        If ikCache is set, converged solutions are stored in it. Cached targets are returned without solving and
+        targets close to a cached one start from its solution instead of q_init. If the cache is keyed on the initial
+        configuration (seedResolution), both only happens for solutions found from a similar q_init.
+
+        :param targets: numpy array [7,] or [num_targets, 7] with cartesian positions (including the offset) and
+                        quaternions [w, x, y, z]
+        :param q_init: numpy array [7,] or [num_targets, 7] with the initial joint configurations; if None,
+                       init_j_pos is used
+        :param maxIter: maximal number of iterations per target
+        :param tol: tolerance on the norm of the pose error
+        :param damping: damping of the least squares steps
+        :param stepSize: scaling of the joint updates
+        :return: joint configurations [num_targets, 7] and the norm of the remaining pose errors [num_targets,]
+                 (or [7,] and a float for a single target)
+        """
+        targets = np.asarray(targets, dtype=np.float64)
+        single = targets.ndim == 1
+        targets = np.atleast_2d(targets)
+        num_targets = targets.shape[0]
+
+        if q_init is None:
+            q_init = self.init_j_pos
+        q_init = np.broadcast_to(np.asarray(q_init, dtype=np.float64)[..., :7], (num_targets, 7))
+
+        solutions = np.zeros((num_targets, 7))
+        residuals = np.zeros(num_targets)
+        for i in range(num_targets):
+            q_start = q_init[i]
+            if self.ikCache is not None:
+                cached = self.ikCache.get(targets[i], q_init[i])
+                if cached is not None:
+                    solutions[i], residuals[i] = cached
+                    continue
+                warm_start = self.ikCache.nearest(targets[i], q_init[i])
+                if warm_start is not None:
+                    q_start = warm_start
+
+            solutions[i], residuals[i] = self._solveInverseKinematics(targets[i], q_start, maxIter, tol, damping,
+                                                                      stepSize)
+            if self.ikCache is not None and residuals[i] < tol:
+                self.ikCache.put(targets[i], solutions[i], residuals[i], q_init[i])
+
+        if single:
+            return solutions[0], residuals[0]
+        return solutions, residuals
+
+    def _solveInverseKinematics(self, target, q_init, maxIter, tol, damping, stepSize):
+        des_pos = target[:3] - self.offset
+        des_quat = target[3:] / np.linalg.norm(target[3:])
+
+        lower = self.model.lowerPositionLimit[:7]
+        upper = self.model.upperPositionLimit[:7]
+        solver = OperationalSpaceSolver(reg=damping)
+        error = np.zeros(6)
+        q = np.zeros(self.model.nq)
+        q[:7] = q_init
+
+        for it in range(maxIter + 1):
+            pinocchio.computeJointJacobians(self.model, self._ik_data, q)
+            pinocchio.updateFramePlacements(self.model, self._ik_data)
+            frame = self._ik_data.oMf[self.end_effector_frame_id]
+
+            quat = pinocchio.Quaternion(frame.rotation).coeffs()  # [x, y, z, w]
+            quat = np.array([quat[3], quat[0], quat[1], quat[2]])
+            if quat.dot(des_quat) < 0:  # both quaternions describe the same orientation, take the shorter way
+                quat = -quat
+            error[:3] = des_pos - frame.translation
+            # vector part of des_quat * conj(quat), i.e. sin(angle / 2) * axis; doubled to match the angular Jacobian
+            error[3:] = 2 * (quat[0] * des_quat[1:] - des_quat[0] * quat[1:] + np.cross(quat[1:], des_quat[1:]))
+            if np.linalg.norm(error) < tol or it == maxIter:
+                break
+
+            J = pinocchio.getFrameJacobian(self.model, self._ik_data, self.end_effector_frame_id,
+                                           pinocchio.LOCAL_WORLD_ALIGNED)[:, :7]
+            dq = solver.solve(J, error)
+            q[:7] = np.clip(q[:7] + stepSize * dq, lower, upper)
+
+        return q[:7], np.linalg.norm(error)
+
     def extract_new_positions(self):
         # This function needs to return:
         # 1: end_effector position
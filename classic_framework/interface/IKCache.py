@@ -0,0 +1,136 @@
+import collections
+import threading
+
+import numpy as np
+
+
+class IKCache:
+    """
+    LRU cache for inverse kinematics solutions.
+
+    Targets (cartesian position and quaternion [w, x, y, z]) are quantized with posResolution and quatResolution, such
+    that repeated requests for the same pose (e.g. grid positions with a fixed orientation) return the stored joint
+    configuration without solving again. Optionally, the initial joint configuration is part of the key as well
+    (seedResolution), if solutions should only be reused when starting from a similar configuration.
+
+    For targets which are not in the cache, :func:`nearest` returns the solution of the closest cached target, which
+    is a good initial configuration for the solver. If the initial configuration is part of the key, only solutions
+    found from a similar initial configuration are returned by :func:`get` and :func:`nearest`. This matters for
+    redundant robots, where solutions from different initial configurations can lie in different parts of the null
+    space and a cached solution would lead to a large joint space motion.
+    """
+
+    def __init__(self, maxsize=256, posResolution=1e-4, quatResolution=1e-4, seedResolution=None,
+                 warmStartRadius=0.1):
+        """
+        :param maxsize: maximal number of stored solutions, the least recently used ones are evicted first
+        :param posResolution: quantization of the target positions in meters
+        :param quatResolution: quantization of the target quaternions
+        :param seedResolution: quantization of the initial joint configurations in radians; None if the initial
+                               configuration should not be part of the key
+        :param warmStartRadius: maximal distance between a target and a cached target to be used for warm starting;
+                                the distance is the position difference in meters plus 1 - |<q1, q2>| of the
+                                quaternions
+        """
+        self.maxsize = maxsize
+        self.posResolution = posResolution
+        self.quatResolution = quatResolution
+        self.seedResolution = seedResolution
+        self.warmStartRadius = warmStartRadius
+
+        self._entries = collections.OrderedDict()  # key -> (target, solution, residual, seed key)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _canonical(target):
+        target = np.asarray(target, dtype=np.float64).reshape(-1)
+        quat = target[3:] / np.linalg.norm(target[3:])
+        if quat[np.flatnonzero(quat)[0]] < 0:  # q and -q describe the same orientation
+            quat = -quat
+        return np.concatenate((target[:3], quat))
+
+    def key(self, target, seed=None):
+        """
+        :param target: numpy array [7,] with position and quaternion [w, x, y, z]
+        :param seed: numpy array [num_joints,] with the initial joint configuration (ignored if seedResolution is None)
+        :return: hashable key of the quantized target
+        """
+        target = self._canonical(target)
+        key = tuple(np.round(target[:3] / self.posResolution).astype(np.int64)) + \
+            tuple(np.round(target[3:] / self.quatResolution).astype(np.int64))
+        seed_key = self._seedKey(seed)
+        if seed_key is not None:
+            key += seed_key
+        return key
+
+    def _seedKey(self, seed):
+        if self.seedResolution is None or seed is None:
+            return None
+        return tuple(np.round(np.asarray(seed) / self.seedResolution).astype(np.int64))
+
+    def get(self, target, seed=None):
+        """
+        :return: tuple (solution, residual) stored for the target or None
+        """
+        key = self.key(target, seed)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1].copy(), entry[2]
+
+    def put(self, target, solution, residual=0.0, seed=None):
+        """
+        Stores a solution, evicting the least recently used entry if the cache is full.
+
+        :return: no return value
+        """
+        key = self.key(target, seed)
+        with self._lock:
+            self._entries[key] = (self._canonical(target), np.array(solution, dtype=np.float64), residual,
+                                  self._seedKey(seed))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def nearest(self, target, seed=None):
+        """
+        Returns the solution of the cached target closest to the given target.
+
+        :param target: numpy array [7,] with position and quaternion [w, x, y, z]
+        :param seed: numpy array [num_joints,] with the initial joint configuration; if seedResolution is set, only
+                     solutions stored for the same quantized initial configuration are considered
+        :return: solution or None if no cached target is within warmStartRadius
+        """
+        seed_key = self._seedKey(seed)
+        with self._lock:
+            entries = [entry for entry in self._entries.values() if seed_key is None or entry[3] == seed_key]
+        if not entries:
+            return None
+
+        target = self._canonical(target)
+        targets = np.array([entry[0] for entry in entries])
+        distance = np.linalg.norm(targets[:, :3] - target[:3], axis=1) + 1 - np.abs(targets[:, 3:].dot(target[3:]))
+        idx = int(np.argmin(distance))
+        if distance[idx] > self.warmStartRadius:
+            return None
+        return entries[idx][1].copy()
+
+    def clear(self):
+        """
+        Removes all entries.
+
+        :return: no return value
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
@@ -0,0 +1,170 @@
+import json
+import os
+import queue
+import threading
+
+import numpy as np
+
+
+class StreamingLogSink:
+    """
+    Streams the channels of a :class:`RobotLogger` to disk, so that long experiments do not have to be kept in memory.
+
+    The logger hands over blocks of chunkSize samples, which are appended to one raw float64 file per channel
+    (<directory>/<channel>.bin) by a background thread. The dimensions of the channels are stored in
+    <directory>/header.json. The written data can be opened with :class:`LogReader` (also while logging), which memory
+    maps the files such that only the accessed slices are read from disk.
+
+    Usage:
+        robot.logger.attachSink(StreamingLogSink('./logs/run_1'))
+        robot.startLogging()
+        ...
+        robot.stopLogging()  # flushes the sink, robot.logger.joint_pos etc. are memory mapped afterwards
+    """
+
+    HEADER = 'header.json'
+
+    def __init__(self, directory, chunkSize=1000, maxQueuedChunks=64):
+        """
+        :param directory: directory the channel files are written to; created if it does not exist
+        :param chunkSize: number of samples the logger collects before they are passed to the writer thread
+        :param maxQueuedChunks: maximum number of chunks waiting to be written, the logger blocks if it is exceeded
+        """
+        self.directory = directory
+        self.chunkSize = chunkSize
+        self.maxQueuedChunks = maxQueuedChunks
+
+        self.channels = {}
+        self.num_samples = 0
+        self._files = {}
+        self._queue = None
+        self._thread = None
+        self._error = None
+
+    @property
+    def isOpen(self):
+        return self._thread is not None
+
+    def open(self):
+        """
+        Starts the writer thread. Existing channel files in the directory are replaced.
+
+        :return: no return value
+        """
+        if self.isOpen:
+            self.close()
+        os.makedirs(self.directory, exist_ok=True)
+        self.channels = {}
+        self.num_samples = 0
+        self._files = {}
+        self._error = None
+        self._queue = queue.Queue(maxsize=self.maxQueuedChunks)
+        self._thread = threading.Thread(target=self._run, name='StreamingLogSink', daemon=True)
+        self._thread.start()
+
+    def write(self, chunk, scalar_channels=()):
+        """
+        Queues a chunk for writing. The arrays must not be modified afterwards.
+
+        :param chunk: dict channel name -> array [num_samples, dim]
+        :param scalar_channels: names of the channels with dimension 1 which are stored as 1d arrays
+        :return: no return value
+        """
+        if self._error is not None:
+            raise self._error
+        self._queue.put((chunk, tuple(scalar_channels)))
+
+    def close(self):
+        """
+        Writes the queued chunks, closes the files and finalizes the header.
+
+        :return: no return value
+        """
+        if not self.isOpen:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        self._queue = None
+        if self._error is not None:
+            raise self._error
+
+    def _run(self):
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                chunk, scalar_channels = item
+                self._write_chunk(chunk, scalar_channels)
+        except Exception as e:
+            self._error = e
+            # keep consuming, such that the logger never blocks on a full queue
+            while self._queue.get() is not None:
+                pass
+        finally:
+            for f in self._files.values():
+                f.close()
+            self._files = {}
+            self._write_header()
+
+    def _write_chunk(self, chunk, scalar_channels):
+        new_channels = False
+        for name, data in chunk.items():
+            dim = data.shape[1]
+            if name not in self.channels:
+                self.channels[name] = {'dim': dim, 'scalar': name in scalar_channels}
+                self._files[name] = open(os.path.join(self.directory, name + '.bin'), 'wb')
+                new_channels = True
+            elif self.channels[name]['dim'] != dim:
+                raise ValueError("Error, the dimension of channel <" + name + "> changed from " +
+                                 str(self.channels[name]['dim']) + " to " + str(dim) + " while streaming.")
+            np.ascontiguousarray(data, dtype=np.float64).tofile(self._files[name])
+            self._files[name].flush()
+        self.num_samples += len(next(iter(chunk.values()))) if chunk else 0
+        if new_channels:
+            self._write_header()
+
+    def _write_header(self):
+        header = {'channels': self.channels, 'num_samples': self.num_samples, 'dtype': 'float64'}
+        tmp_path = os.path.join(self.directory, self.HEADER + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(header, f, indent=2)
+        os.replace(tmp_path, os.path.join(self.directory, self.HEADER))
+
+
+class LogReader:
+    """
+    Read access to the channels written by a :class:`StreamingLogSink`. Each channel is returned as a read-only
+    numpy memmap, i.e. data is only loaded from disk when it is accessed.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, StreamingLogSink.HEADER)) as f:
+            self.header = json.load(f)
+        self.channels = self.header['channels']
+
+    def __contains__(self, name):
+        return name in self.channels
+
+    def __getitem__(self, name):
+        return self.load(name)
+
+    def load(self, name):
+        """
+        :param name: name of the channel, e.g. 'joint_pos'
+        :return: numpy memmap [num_samples, dim] (or [num_samples] for scalar channels)
+        """
+        channel = self.channels[name]
+        path = os.path.join(self.directory, name + '.bin')
+        dim = channel['dim']
+        # the number of samples is derived from the file size, so that logs of runs still in progress can be read
+        num_samples = os.path.getsize(path) // (8 * dim) if dim > 0 else self.header['num_samples']
+        if num_samples == 0 or dim == 0:
+            data = np.zeros((num_samples, dim))
+        else:
+            data = np.memmap(path, dtype=np.float64, mode='r', shape=(num_samples, dim))
+        if channel['scalar']:
+            data = data[:, 0]
+        return data
@@ -1,6 +1,10 @@
+import logging
+
 import numpy as np
 from enum import Flag, auto
 
+from classic_framework.interface.LogSink import LogReader
+
 class LoggerBase:
     def __init__(self, object):
         """
@@ -52,6 +56,11 @@ class RobotPlotFlags(Flag):
     END_EFFECTOR = CART_POS | CART_VEL | ORIENTATION | ORIENTATION_VEL
 
 
+ALL_PLOT_FLAGS = RobotPlotFlags(0)
+for _flag in RobotPlotFlags:
+    ALL_PLOT_FLAGS |= _flag
+
+
 class RobotLogger(LoggerBase):
     """
     Logger for the
@@ -72,197 +81,211 @@ class RobotLogger(LoggerBase):
     :return: no return value
     """
 
-    def __init__(self, robot):
-        super().__init__(robot)
-        """
-        Initialization of the quantities to log.
-        """
-
-        self.isLogging = False
-
+    # logged quantities: name of the array available after :func:`stopLogging`, the plot flags which need the quantity
+    # and the getter for the current value
+    CHANNELS = (
         # joints
-        self.joint_pos_list = []
-        self.joint_vel_list = []
-        self.des_joint_pos_list = []
-        self.des_joint_vel_list = []
-        self.des_joint_acc_list = []
+        ('joint_pos', RobotPlotFlags.JOINT_POS, lambda robot: robot.current_j_pos),
+        ('joint_vel', RobotPlotFlags.JOINT_VEL | RobotPlotFlags.JOINT_ACC, lambda robot: robot.current_j_vel),
+        ('des_joint_pos', RobotPlotFlags.JOINT_POS, lambda robot: robot.des_joint_pos),
+        ('des_joint_vel', RobotPlotFlags.JOINT_VEL, lambda robot: robot.des_joint_vel),
+        ('des_joint_acc', RobotPlotFlags.JOINT_ACC, lambda robot: robot.des_joint_acc),
 
         # fingers
-        self.finger_pos_list = []
-        self.finger_vel_list = []
-        self.des_finger_pos_list = []
-        self.gripper_width_list = []
+        ('finger_pos', RobotPlotFlags.GRIPPER_POS, lambda robot: robot.current_fing_pos),
+        ('finger_vel', RobotPlotFlags.GRIPPER_POS, lambda robot: robot.current_fing_vel),
+        ('des_finger_pos', RobotPlotFlags.GRIPPER_POS | RobotPlotFlags.GRIPPER_WIDTH,
+         lambda robot: robot.set_gripper_width),
+        ('gripper_width', RobotPlotFlags.GRIPPER_WIDTH, lambda robot: robot.gripper_width),
 
         # end effector
-        self.cart_pos_list = []
-        self.cart_vel_list = []
-        self.cart_quat_list = []
-        self.cart_quat_vel_list = []
-        self.des_c_pos_list = []
-        self.des_c_vel_list = []
-        self.des_quat_list = []
-        self.des_quat_vel_list = []
+        ('cart_pos', RobotPlotFlags.CART_POS, lambda robot: robot.get_end_effector_pos()),
+        ('cart_vel', RobotPlotFlags.CART_VEL, lambda robot: robot.current_c_vel),
+        ('cart_quat', RobotPlotFlags.ORIENTATION, lambda robot: robot.current_c_quat),
+        ('cart_quat_vel', RobotPlotFlags.ORIENTATION_VEL, lambda robot: robot.current_c_quat_vel),
+        ('des_c_pos', RobotPlotFlags.CART_POS, lambda robot: robot.des_c_pos),
+        ('des_c_vel', RobotPlotFlags.CART_VEL, lambda robot: robot.des_c_vel),
+        ('des_quat', RobotPlotFlags.ORIENTATION, lambda robot: robot.des_quat),
+        ('des_quat_vel', RobotPlotFlags.ORIENTATION_VEL, lambda robot: robot.des_quat_vel),
 
         # commands and forces
-        self.uff_list = []
-        self.last_cmd_list = []
-        self.time_stamp_list = []
-        self.command_list = []
-        self.grav_term_list = []
-        self.load_list = []
+        ('uff', RobotPlotFlags.TORQUES | RobotPlotFlags.GRIPPER_FORCE, lambda robot: robot.uff),
+        ('last_cmd', RobotPlotFlags.COMMAND, lambda robot: robot.last_cmd),
+        ('time_stamp', RobotPlotFlags.TIME_STAMPS, lambda robot: robot.time_stamp),
+        ('command', RobotPlotFlags.COMMAND, lambda robot: robot.command),
+        ('grav_terms', RobotPlotFlags.GRAVITY, lambda robot: robot.grav_terms),
+        ('load', RobotPlotFlags.LOADS, lambda robot: robot.current_load),
+    )
+
+    def __init__(self, robot, initialCapacity=10000):
+        super().__init__(robot)
+        """
+        Initialization of the quantities to log.
+
+        Every quantity is stored in its own preallocated [capacity, dim] array. The dimension of a quantity is taken
+        from its first sample. The capacity starts at initialCapacity and is doubled when it is exhausted until it
+        reaches maxTimeSteps. From then on the oldest samples are overwritten (ring buffer).
+
+        If a :class:`StreamingLogSink` is attached (see :func:`attachSink`), the capacity is the chunk size of the
+        sink and every full chunk is handed to the sink instead of being kept in memory.
+        """
+
+        self.isLogging = False
 
         self.maxTimeSteps = 5000000000000000
+        self.initialCapacity = initialCapacity
         self.robot = robot
 
-    def startLogging(self):
+        self._buffers = {}
+        self._scalar_channels = set()
+        self._capacity = 0
+        self._count = 0
+        self.sink = None
+
+        self.loggedFlags = ALL_PLOT_FLAGS
+        self._plan = [(name, getter) for name, _, getter in self.CHANNELS]
+
+    def attachSink(self, sink):
         """
-        Starts logging.
+        Streams the logged data to the given sink from the next call of :func:`startLogging` on.
 
+        :param sink: :class:`StreamingLogSink` or None to keep the data in memory
         :return: no return value
         """
-        # joints
-        self.joint_pos_list = []
-        self.joint_vel_list = []
-        self.des_joint_pos_list = []
-        self.des_joint_vel_list = []
-        self.des_joint_acc_list = []
-
-        # fingers
-        self.finger_pos_list = []
-        self.finger_vel_list = []
-        self.des_finger_pos_list = []
-        self.gripper_width_list = []
+        self.sink = sink
 
-        # end effector
-        self.cart_pos_list = []
-        self.cart_vel_list = []
-        self.cart_quat_list = []
-        self.cart_quat_vel_list = []
-        self.des_c_pos_list = []
-        self.des_c_vel_list = []
-        self.des_quat_list = []
-        self.des_quat_vel_list = []
+    def startLogging(self, flags=None):
+        """
+        Starts logging.
 
-        # commands and forces
-        self.uff_list = []
-        self.last_cmd_list = []
-        self.time_stamp_list = []
-        self.command_list = []
-        self.grav_term_list = []
-        self.load_list = []
+        :param flags: :class:`RobotPlotFlags` selecting the quantities to log; the time stamps are always logged. If
+                      None, all quantities are logged.
+        :return: no return value
+        """
+        if flags is None:
+            flags = ALL_PLOT_FLAGS
+        self.loggedFlags = flags | RobotPlotFlags.TIME_STAMPS
+        # capture plan, the quantities which are not selected are not even read from the robot
+        self._plan = [(name, getter) for name, channel_flags, getter in self.CHANNELS
+                      if channel_flags & self.loggedFlags]
+
+        # arrays of quantities which are not logged in this run are removed
+        for name, _, __ in self.CHANNELS:
+            self.__dict__.pop(name, None)
+
+        # new buffers, since the arrays of a previous run may still be in use
+        self._buffers = {}
+        self._scalar_channels = set()
+        self._capacity = 0
+        self._count = 0
+        if self.sink is not None:
+            self.sink.open()
 
     def logData(self):
         """
-        Appends current state of each logged value.
+        Writes current state of each logged value to the buffers.
 
         :param robot: instance of the robot
         :return: no return value
         """
-        robot = self.robot
+        if self._count >= self._capacity and self._capacity < self._capacityLimit():
+            self._grow()
+        row = self._count % self._capacity
 
-        # joints
-        self.joint_pos_list.append(robot.current_j_pos)
-        self.joint_vel_list.append(robot.current_j_vel)
-        self.des_joint_pos_list.append(robot.des_joint_pos)
-        self.des_joint_vel_list.append(robot.des_joint_vel)
-        self.des_joint_acc_list.append(robot.des_joint_acc)
+        robot = self.robot
+        for name, getter in self._plan:
+            self._write(name, row, getter(robot))
+        self._count += 1
 
-        # fingers
-        self.finger_pos_list.append(robot.current_fing_pos)
-        self.finger_vel_list.append(robot.current_fing_vel)
-        self.des_finger_pos_list.append(robot.set_gripper_width)
-        self.gripper_width_list.append(robot.gripper_width)
+        if self.sink is not None and self._count % self._capacity == 0:
+            self._flushToSink(self._capacity)
 
-        # end effector
-        self.cart_pos_list.append(robot.get_end_effector_pos())
-        self.cart_vel_list.append(robot.current_c_vel)
-        self.cart_quat_list.append(robot.current_c_quat)
-        self.cart_quat_vel_list.append(robot.current_c_quat_vel)
-        self.des_c_pos_list.append(robot.des_c_pos)
-        self.des_c_vel_list.append(robot.des_c_vel)
-        self.des_quat_list.append(robot.des_quat)
-        self.des_quat_vel_list.append(robot.des_quat_vel)
+    @property
+    def num_samples(self):
+        """
+        :return: number of samples currently held by the logger
+        """
+        return min(self._count, self._capacity)
+
+    def _capacityLimit(self):
+        return self.sink.chunkSize if self.sink is not None else self.maxTimeSteps
+
+    def _grow(self):
+        if self.sink is not None:
+            capacity = self.sink.chunkSize
+        else:
+            capacity = int(min(max(2 * self._capacity, self.initialCapacity, 1), self.maxTimeSteps))
+        for name, buffer in self._buffers.items():
+            grown = np.full((capacity, buffer.shape[1]), np.nan)
+            grown[:self._capacity] = buffer
+            self._buffers[name] = grown
+        self._capacity = capacity
+
+    def _write(self, name, row, value):
+        if isinstance(value, np.ndarray):
+            dim = value.size
+        elif isinstance(value, (list, tuple)):
+            dim = len(value)
+        else:
+            dim = 1
+
+        buffer = self._buffers.get(name)
+        if buffer is None:
+            buffer = np.full((self._capacity, dim), np.nan)
+            self._buffers[name] = buffer
+            if np.ndim(value) == 0:
+                self._scalar_channels.add(name)
+        elif buffer.shape[1] < dim:
+            # the dimension of a quantity changed (e.g. uff after adding the finger commands), pad the old samples
+            widened = np.full((self._capacity, dim), np.nan)
+            widened[:, :buffer.shape[1]] = buffer
+            buffer = widened
+            self._buffers[name] = buffer
+
+        buffer[row, :dim] = value
+        if dim < buffer.shape[1]:
+            buffer[row, dim:] = np.nan
+
+    def _ordered(self, buffer):
+        """
+        :return: the logged samples in chronological order; a view as long as the ring buffer did not wrap around
+        """
+        if self._count <= self._capacity:
+            return buffer[:self._count]
+        start = self._count % self._capacity
+        return np.concatenate((buffer[start:], buffer[:start]))
 
-        # commands and forces
-        self.uff_list.append(robot.uff.copy())
-        self.last_cmd_list.append(robot.last_cmd)
-        self.time_stamp_list.append(robot.time_stamp)
-        self.command_list.append(robot.command)
-        self.grav_term_list.append(robot.grav_terms)
-        self.load_list.append(robot.current_load)
-
-        if len(self.joint_pos_list) > self.maxTimeSteps:
-            #joints
-            self.joint_pos_list.pop(0)
-            self.joint_vel_list.pop(0)
-            self.des_joint_pos_list.pop(0)
-            self.des_joint_vel_list.pop(0)
-            self.des_joint_acc_list.pop(0)
-
-            # fingers
-            self.des_finger_pos_list.pop(0)
-            self.finger_vel_list.pop(0)
-            #self.des_finger_pos_list.pop(0)
-            self.gripper_width_list.pop(0)
-
-            # end effector
-            self.cart_pos_list.pop(0)
-            self.cart_vel_list.pop(0)
-            self.cart_quat_list.pop(0)
-            self.des_c_pos_list.pop(0)
-            self.des_c_vel_list.pop(0)
-            self.des_quat_list.pop(0)
-            self.des_quat_vel_list.pop(0)
-
-            # commands and forces
-            self.uff_list.pop(0)
-            self.last_cmd_list.pop(0)
-            self.time_stamp_list.pop(0)
-            self.command_list.pop(0)
-            self.grav_term_list.pop(0)
-            self.load_list.pop(0)
+    def _flushToSink(self, num_samples):
+        # the buffers are overwritten by the next samples, hence the writer thread gets copies
+        chunk = {name: buffer[:num_samples].copy() for name, buffer in self._buffers.items()}
+        self.sink.write(chunk, self._scalar_channels)
 
     def stopLogging(self):
         """
-        Stops logging.
+        Stops logging. If a sink is attached, the remaining samples are flushed and the logged arrays are memory
+        mapped from the files of the sink.
 
         :return: No return value
         """
 
         self.isLogging = False
-        if len(self.time_stamp_list) > 0:
-
-            # joints
-            self.joint_pos = np.array(self.joint_pos_list)
-            self.joint_vel = np.array(self.joint_vel_list)
-            self.des_joint_pos = np.array(self.des_joint_pos_list)
-            self.des_joint_vel = np.array(self.des_joint_vel_list)
-            self.des_joint_acc = np.array(self.des_joint_acc_list)
-
-            # fingers
-            self.finger_pos = np.array(self.finger_pos_list)
-            self.finger_vel = np.array(self.finger_vel_list)
-            self.des_finger_pos = np.array(self.des_finger_pos_list)
-            self.gripper_width = np.array(self.gripper_width_list)
-
-            # end effector
-            self.cart_pos = np.array(self.cart_pos_list)
-            self.cart_vel = np.array(self.cart_vel_list)
-            self.cart_quat = np.array(self.cart_quat_list)
-            self.cart_quat_vel = np.array(self.cart_quat_vel_list)
-            self.des_c_pos = np.array(self.des_c_pos_list)
-            self.des_c_vel = np.array(self.des_c_vel_list)
-            self.des_quat = np.array(self.des_quat_list)
-            self.des_quat_vel = np.array(self.des_quat_vel_list)
-
-            # commands and forces
-            self.uff = np.array(self.uff_list)
-            self.last_cmd = np.array(self.last_cmd_list)
-            self.command = np.array(self.command_list)
-            self.grav_terms = np.array(self.grav_term_list)
-            self.time_stamp = np.array(self.time_stamp_list)
+        if self.sink is not None and self.sink.isOpen:
+            remainder = self._count % self._capacity if self._capacity > 0 else 0
+            if remainder > 0:
+                self._flushToSink(remainder)
+            self.sink.close()
+            if self._count > 0:
+                reader = LogReader(self.sink.directory)
+                for name in reader.channels:
+                    setattr(self, name, reader.load(name))
+                self.time_stamp = self.time_stamp - self.time_stamp[0]
+        elif self._count > 0:
+            for name, buffer in self._buffers.items():
+                data = self._ordered(buffer)
+                if name in self._scalar_channels:
+                    data = data[:, 0]
+                setattr(self, name, data)
             self.time_stamp = self.time_stamp - self.time_stamp[0]
-            self.load = np.array(self.load_list)
 
     def plot(self, plotSelection = RobotPlotFlags.JOINTS):
         """
@@ -286,7 +309,11 @@ class RobotLogger(LoggerBase):
         if self.isLogging:
             self.stopLogging()
 
-        robot_acceleration = np.diff(self.joint_vel, 1, axis=0) / self.robot.dt
+        if plotSelection & ~self.loggedFlags:
+            logging.warning("The quantities of " + str(plotSelection & ~self.loggedFlags) + " have not been logged "
+                            "and are not plotted. Select them in startLogging.")
+            plotSelection = plotSelection & self.loggedFlags
+
         j1_limit_lower = -2.9671
         j1_limit_upper = 2.9671
         j2_limit_lower = -1.8326
@@ -383,6 +410,7 @@ class RobotLogger(LoggerBase):
             plt.title(' joint velocities ')
 
         if RobotPlotFlags.JOINT_ACC in plotSelection:
+            robot_acceleration = np.diff(self.joint_vel, 1, axis=0) / self.robot.dt
             acceleration_fig = plt.figure()
             for k in range(7):
                 plt.figure(acceleration_fig.number)
@@ -1,6 +1,8 @@
 from classic_framework.controllers import Config
+from classic_framework.controllers.TrajectoryGeneration import Trajectory
 from classic_framework.interface.Logger import RobotLogger
 
+import logging
 
 import numpy as np
 
@@ -35,6 +37,8 @@ class RobotBase:
         self.controlMode = "torque"
         self.clip_actions = True
         self.rate_limit = 0.8  # Rate torque limit
+        # number of simulation steps per evaluation of the controller, the command is held in between
+        self.control_decimation = 1
         self.end_effector = None
 
         # torque-based controllers
@@ -83,6 +87,10 @@ class RobotBase:
         self.grav_terms = np.zeros(9) * np.nan
         self.current_load = []  # only for the joints (no fingers) for now
 
+        # kinematics cache, see getCachedJacobian
+        self._cached_jacobian = None
+        self._cached_jacobian_q = None
+
         self.logger = RobotLogger(self)
 
         self.counter = 0
@@ -96,23 +104,68 @@ class RobotBase:
         # self.gotoCartPosQuatController.resetTrajectory()
         # self.gotoCartPosQuatPlanningController.resetTrajectory()
 
+    def setControlFrequency(self, frequency):
+        """
+        Sets the rate at which the controllers are evaluated. The simulation keeps running with dt; in between two
+        evaluations the last command is applied (zero-order hold). The frequency is rounded to an integer divisor of
+        the simulation frequency.
+
+        :param frequency: controller frequency in Hz, None to evaluate the controller in every simulation step
+        :return: no return value
+        """
+        if frequency is None:
+            self.control_decimation = 1
+            return
+        if frequency <= 0:
+            raise ValueError("Error, the controller frequency has to be positive, got " + str(frequency) + ".")
+
+        self.control_decimation = max(1, int(np.round(1.0 / (frequency * self.dt))))
+        effective_frequency = 1.0 / (self.control_decimation * self.dt)
+        if abs(effective_frequency - frequency) > 0.05 * frequency:
+            logging.warning("The controller frequency of " + str(frequency) + " Hz is not an integer divisor of the "
+                            "simulation frequency of " + str(1.0 / self.dt) + " Hz, the controllers are evaluated "
+                            "with " + str(effective_frequency) + " Hz.")
+
     def getJacobian(self, q=None):
         raise NotImplementedError
 
+    def getCachedJacobian(self):
+        """
+        Jacobian (6x7) at the current joint positions. It is only recomputed if current_j_pos changed since the last
+        call, i.e. once per time step, and shared between all controllers evaluated in this time step.
+
+        :return: numpy array; jacobian matrix (must not be modified)
+        """
+        q = self.current_j_pos
+        if self._cached_jacobian is None or not np.array_equal(q, self._cached_jacobian_q):
+            self._cached_jacobian = self.computeCurrentJacobian()
+            self._cached_jacobian_q = np.array(q, copy=True)
+        return self._cached_jacobian
+
+    def computeCurrentJacobian(self):
+        """
+        Computes the jacobian for the state received in the last call of receiveState. Robots which can compute the
+        jacobian directly from current_j_pos (instead of querying the simulation state again) should overwrite this.
+
+        :return: numpy array; jacobian matrix (6x7)
+        """
+        return self.getJacobian()
+
     def getForwardKinematics(self, q=None):
         raise NotImplementedError
 
     def nextStep(self):
         raise NotImplementedError
 
-    def startLogging(self):
+    def startLogging(self, flags=None):
         """
         Callback to the logger to start logging.
 
+        :param flags: :class:`RobotPlotFlags` selecting the logged quantities; if None, everything is logged
         :return: no return value
         """
         self.logger.isLogging = True
-        self.logger.startLogging()
+        self.logger.startLogging(flags=flags)
 
     def stopLogging(self):
         """
@@ -136,9 +189,9 @@ class RobotBase:
         self.ctrl_duration = duration
 
         if gains is None:  # use default gains
-            data = self.config.load_yaml('PD_control_gains')
-            pgain = np.array(data['pgain'], dtype=np.float64)
-            dgain = np.array(data['dgain'], dtype=np.float64)
+            data = self.config.load_gains('PD_control_gains')
+            pgain = data['pgain']
+            dgain = data['dgain']
         else:  # use specified gains
             pgain = gains['pgain']
             dgain = gains['dgain']
@@ -148,18 +201,28 @@ class RobotBase:
         self.gotoJointController.executeController(self, duration)
 
     def follow_JointTraj(self, desiredTraj, gains=None):
+        """
+        Tracks a joint trajectory.
+
+        :param desiredTraj: numpy array (num_time_stamps, num_joints) sampled with dt, or a :class:`Trajectory` object
+                            which is evaluated at the robot time stamps
+        :param gains: dict with pgain and dgain, None for the default gains
+        :return: no return value
+        """
         if gains is None:  # use default gains
-            data = self.config.load_yaml('PD_control_gains')
-            pgain = np.array(data['pgain'], dtype=np.float64)
-            dgain = np.array(data['dgain'], dtype=np.float64)
+            data = self.config.load_gains('PD_control_gains')
+            pgain = data['pgain']
+            dgain = data['dgain']
         else:  # use specified gains
             pgain = gains['pgain']
             dgain = gains['dgain']
         self.jointTrajectoryTracker.trackingController.setGains(pgain, dgain)
         self.jointTrajectoryTracker.setTrajectory(trajectory=desiredTraj)
-        self.jointTrajectoryTracker.executeController(self,
-                                                      maxDuration=desiredTraj.
-                                                      shape[0]*self.dt)
+        if isinstance(desiredTraj, Trajectory):
+            duration = desiredTraj.duration
+        else:
+            duration = desiredTraj.shape[0] * self.dt
+        self.jointTrajectoryTracker.executeController(self, maxDuration=duration)
 
     def gotoCartPosition(self, desiredPos, duration=4.0):
         """
@@ -171,11 +234,11 @@ class RobotBase:
         :return: no return value
         """
         self.ctrl_duration = duration
-        data = self.config.load_yaml('cart_ctrl_gains')
-        pgain = np.array(data['cart_ctrl_pgain'], dtype=np.float64)
-        dgain = np.array(data['cart_ctrl_dgain'], dtype=np.float64)
-        pgain_null = np.array(data['cart_ctrl_pgain_null'], dtype=np.float64)
-        dgain_null = np.array(data['cart_ctrl_dgain_null'], dtype=np.float64)
+        data = self.config.load_gains('cart_ctrl_gains')
+        pgain = data['cart_ctrl_pgain']
+        dgain = data['cart_ctrl_dgain']
+        pgain_null = data['cart_ctrl_pgain_null']
+        dgain_null = data['cart_ctrl_dgain_null']
         # if self isinstance(Py)
         self.gotoCartPosController.trackingController.pgain = pgain
         self.gotoCartPosController.trackingController.dgain = dgain
@@ -196,13 +259,11 @@ class RobotBase:
         """
         #TODO: Find better solution for loadin config files
         self.ctrl_duration = duration
-        data = self.config.load_yaml('cartAndOr_ctrl_gains')
-        pgain = np.array(data['cartAndOr_ctrl_pgain'], dtype=np.float64)
-        dgain = np.array(data['cartAndOr_ctrl_dgain'], dtype=np.float64)
-        pgain_null = np.array(data['cartAndOr_ctrl_pgain_null'],
-                              dtype=np.float64)
-        dgain_null = np.array(data['cartAndOr_ctrl_dgain_null'],
-                              dtype=np.float64)
+        data = self.config.load_gains('cartAndOr_ctrl_gains')
+        pgain = data['cartAndOr_ctrl_pgain']
+        dgain = data['cartAndOr_ctrl_dgain']
+        pgain_null = data['cartAndOr_ctrl_pgain_null']
+        dgain_null = data['cartAndOr_ctrl_dgain_null']
         self.gotoCartPosQuatController.trackingController.pgain = pgain
         self.gotoCartPosQuatController.trackingController.dgain = dgain
         self.gotoCartPosQuatController.trackingController.pgain_null = pgain_null
@@ -213,9 +274,9 @@ class RobotBase:
 
     def gotoCartPositionAndQuatFictiveRobot(self, desiredPos, desiredQuat, duration=4.0):
         self.ctrl_duration = duration
-        data = self.config.load_yaml('PD_control_gains')
-        pgain = np.array(data['pgain'], dtype=np.float64)
-        dgain = np.array(data['dgain'], dtype=np.float64)
+        data = self.config.load_gains('PD_control_gains')
+        pgain = data['pgain']
+        dgain = data['dgain']
         self.gotoJointController.trackingController.setGains(pgain, dgain)
 
         self.gotoCartPosQuatPlanningController.setDesiredPos(np.hstack((desiredPos, desiredQuat)))
@@ -236,13 +297,11 @@ class RobotBase:
     def follow_CartPositionAndQuatTraj(self, desiredTraj, desiredQuat):
         duration = desiredTraj.shape[0] * self.dt
         self.ctrl_duration = duration
-        data = self.config.load_yaml('cartAndOr_ctrl_gains')
-        pgain = np.array(data['cartAndOr_ctrl_pgain'], dtype=np.float64)
-        dgain = np.array(data['cartAndOr_ctrl_dgain'], dtype=np.float64)
-        pgain_null = np.array(data['cartAndOr_ctrl_pgain_null'],
-                              dtype=np.float64)
-        dgain_null = np.array(data['cartAndOr_ctrl_dgain_null'],
-                              dtype=np.float64)
+        data = self.config.load_gains('cartAndOr_ctrl_gains')
+        pgain = data['cartAndOr_ctrl_pgain']
+        dgain = data['cartAndOr_ctrl_dgain']
+        pgain_null = data['cartAndOr_ctrl_pgain_null']
+        dgain_null = data['cartAndOr_ctrl_dgain_null']
         self.gotoCartPosQuatController.trackingController.pgain = pgain
         self.gotoCartPosQuatController.trackingController.dgain = dgain
         self.gotoCartPosQuatController.trackingController.pgain_null = pgain_null
@@ -1,3 +1,5 @@
 from .Robots import *
 from .Logger import *
+from .LogSink import *
+from .IKCache import *
 from .Scene import *
@@ -0,0 +1,108 @@
+import numpy as np
+from unittest import TestCase
+
+from classic_framework.interface.IKCache import IKCache
+
+
+def target(x, y, z, quat=(0., 1., 0., 0.)):
+    return np.concatenate(([x, y, z], quat))
+
+
+class TestIKCache(TestCase):
+    def setUp(self) -> None:
+        self.cache = IKCache(maxsize=3, posResolution=1e-3, quatResolution=1e-3, warmStartRadius=0.05)
+        self.solution = np.arange(7) / 10
+
+    def testQuantization(self):
+        self.cache.put(target(0.5, 0.0, 0.2), self.solution, 1e-5)
+        solution, residual = self.cache.get(target(0.5002, -0.0004, 0.2001))
+        np.testing.assert_array_equal(solution, self.solution)
+        self.assertEqual(residual, 1e-5)
+        self.assertIsNone(self.cache.get(target(0.502, 0.0, 0.2)))
+
+    def testQuaternionSign(self):
+        # q and -q describe the same orientation, the quaternion is normalized as well
+        quat = np.array([0.5, 0.5, -0.5, 0.5])
+        self.cache.put(target(0.5, 0.0, 0.2, quat), self.solution)
+        self.assertEqual(self.cache.key(target(0.5, 0.0, 0.2, -quat)), self.cache.key(target(0.5, 0.0, 0.2, quat)))
+        self.assertIsNotNone(self.cache.get(target(0.5, 0.0, 0.2, -quat)))
+        self.assertIsNotNone(self.cache.get(target(0.5, 0.0, 0.2, 2 * quat)))
+        # the sign is taken from the first non zero entry
+        quat = np.array([0., -1., 0., 0.])
+        self.assertEqual(self.cache.key(target(0.5, 0.0, 0.2, quat)), self.cache.key(target(0.5, 0.0, 0.2, -quat)))
+
+    def testReturnsCopies(self):
+        self.cache.put(target(0.5, 0.0, 0.2), self.solution)
+        solution, _ = self.cache.get(target(0.5, 0.0, 0.2))
+        solution[:] = 0
+        self.solution[:] = 0
+        np.testing.assert_array_equal(self.cache.get(target(0.5, 0.0, 0.2))[0], np.arange(7) / 10)
+
+    def testLRUEviction(self):
+        for i in range(3):
+            self.cache.put(target(0.1 * i, 0.0, 0.2), self.solution + i)
+        self.cache.get(target(0.0, 0.0, 0.2))  # the first entry is now the most recently used
+        self.cache.put(target(0.3, 0.0, 0.2), self.solution + 3)
+
+        self.assertEqual(len(self.cache), 3)
+        self.assertIsNotNone(self.cache.get(target(0.0, 0.0, 0.2)))
+        self.assertIsNone(self.cache.get(target(0.1, 0.0, 0.2)))
+        self.assertIsNotNone(self.cache.get(target(0.2, 0.0, 0.2)))
+        self.assertIsNotNone(self.cache.get(target(0.3, 0.0, 0.2)))
+
+    def testPutReplaces(self):
+        self.cache.put(target(0.5, 0.0, 0.2), self.solution, 1e-3)
+        self.cache.put(target(0.5, 0.0, 0.2), self.solution + 1, 1e-6)
+        self.assertEqual(len(self.cache), 1)
+        solution, residual = self.cache.get(target(0.5, 0.0, 0.2))
+        np.testing.assert_array_equal(solution, self.solution + 1)
+        self.assertEqual(residual, 1e-6)
+
+    def testNearest(self):
+        self.assertIsNone(self.cache.nearest(target(0.5, 0.0, 0.2)))
+        self.cache.put(target(0.5, 0.0, 0.2), self.solution)
+        self.cache.put(target(0.6, 0.0, 0.2), self.solution + 1)
+
+        np.testing.assert_array_equal(self.cache.nearest(target(0.52, 0.0, 0.2)), self.solution)
+        np.testing.assert_array_equal(self.cache.nearest(target(0.58, 0.01, 0.2)), self.solution + 1)
+
+    def testNearestRadius(self):
+        self.cache.put(target(0.5, 0.0, 0.2), self.solution)
+        self.assertIsNotNone(self.cache.nearest(target(0.54, 0.0, 0.2)))
+        self.assertIsNone(self.cache.nearest(target(0.56, 0.0, 0.2)))
+        # the orientation distance is 1 - |<q1, q2>|, 0.1 for a rotation by about 51 degrees
+        angle = 2 * np.arccos(0.9)
+        quat = np.array([0., np.cos(angle / 2), np.sin(angle / 2), 0.])
+        self.assertIsNone(self.cache.nearest(target(0.5, 0.0, 0.2, quat)))
+        self.assertIsNotNone(self.cache.nearest(target(0.5, 0.0, 0.2, [0., -1., 0., 0.])))
+
+    def testHitsAndMisses(self):
+        self.cache.put(target(0.5, 0.0, 0.2), self.solution)
+        self.cache.get(target(0.5, 0.0, 0.2))
+        self.cache.get(target(0.5, 0.0, 0.2))
+        self.cache.get(target(0.1, 0.0, 0.2))
+        self.cache.nearest(target(0.1, 0.0, 0.2))  # warm starting is not counted
+        self.assertEqual(self.cache.hits, 2)
+        self.assertEqual(self.cache.misses, 1)
+
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.hits, 0)
+        self.assertEqual(self.cache.misses, 0)
+
+    def testSeed(self):
+        cache = IKCache(seedResolution=0.05, warmStartRadius=0.05)
+        seed = np.zeros(7)
+        cache.put(target(0.5, 0.0, 0.2), self.solution, seed=seed)
+
+        self.assertIsNotNone(cache.get(target(0.5, 0.0, 0.2), seed + 0.01))
+        self.assertIsNone(cache.get(target(0.5, 0.0, 0.2), seed + 0.1))
+        self.assertIsNotNone(cache.nearest(target(0.52, 0.0, 0.2), seed + 0.01))
+        self.assertIsNone(cache.nearest(target(0.52, 0.0, 0.2), seed + 0.1))
+        # without a seed, all solutions are considered
+        self.assertIsNotNone(cache.nearest(target(0.52, 0.0, 0.2)))
+
+    def testSeedIgnoredWithoutResolution(self):
+        self.cache.put(target(0.5, 0.0, 0.2), self.solution, seed=np.zeros(7))
+        self.assertIsNotNone(self.cache.get(target(0.5, 0.0, 0.2), np.ones(7)))
+        self.assertIsNotNone(self.cache.nearest(target(0.5, 0.0, 0.2), np.ones(7)))
@@ -0,0 +1,163 @@
+import os
+import tempfile
+
+import numpy as np
+from unittest import TestCase
+
+from classic_framework.interface.LogSink import LogReader, StreamingLogSink
+from classic_framework.interface.Logger import RobotLogger, RobotPlotFlags
+
+LOGGED_FLAGS = RobotPlotFlags.JOINT_POS | RobotPlotFlags.GRIPPER_WIDTH | RobotPlotFlags.TORQUES
+
+
+class StubRobot:
+    """
+    Provides the quantities of the joint position, gripper width and torque channels. Every call of step changes all
+    of them, such that each logged sample identifies its time step.
+    """
+
+    def __init__(self, uff_dim=2):
+        self.uff_dim = uff_dim
+        self.step(0)
+
+    def step(self, t):
+        self.time_stamp = 0.5 + 0.1 * t
+        self.current_j_pos = t + np.arange(7) / 10
+        self.des_joint_pos = -self.current_j_pos
+        self.gripper_width = float(t)
+        self.set_gripper_width = 2. * t
+        self.uff = t * np.ones(self.uff_dim)
+
+
+def log(logger, robot, time_steps):
+    for t in time_steps:
+        robot.step(t)
+        logger.logData()
+
+
+class TestRobotLogger(TestCase):
+    def setUp(self) -> None:
+        self.robot = StubRobot()
+        self.logger = RobotLogger(self.robot, initialCapacity=4)
+
+    def assertLogged(self, time_steps):
+        time_steps = np.asarray(time_steps)
+        np.testing.assert_array_equal(self.logger.joint_pos, time_steps[:, None] + np.arange(7) / 10)
+        np.testing.assert_array_equal(self.logger.des_joint_pos, -self.logger.joint_pos)
+        np.testing.assert_array_equal(self.logger.gripper_width, time_steps)
+        np.testing.assert_allclose(self.logger.time_stamp, 0.1 * (time_steps - time_steps[0]))
+
+    def testGrow(self):
+        self.logger.startLogging(LOGGED_FLAGS)
+        log(self.logger, self.robot, range(10))
+        self.assertEqual(self.logger._capacity, 16)
+        self.assertEqual(self.logger.num_samples, 10)
+        self.logger.stopLogging()
+        self.assertLogged(range(10))
+
+    def testUnselectedChannels(self):
+        self.logger.startLogging(RobotPlotFlags.GRIPPER_WIDTH)
+        log(self.logger, self.robot, range(3))
+        self.logger.stopLogging()
+        self.assertFalse(hasattr(self.logger, 'joint_pos'))
+        np.testing.assert_array_equal(self.logger.gripper_width, [0., 1., 2.])
+
+    def testRingBuffer(self):
+        self.logger.maxTimeSteps = 6
+        self.logger.startLogging(LOGGED_FLAGS)
+        log(self.logger, self.robot, range(15))
+        self.assertEqual(self.logger._capacity, 6)
+        self.assertEqual(self.logger.num_samples, 6)
+        self.logger.stopLogging()
+        self.assertLogged(range(9, 15))
+
+    def testRingBufferFull(self):
+        self.logger.maxTimeSteps = 4
+        self.logger.startLogging(LOGGED_FLAGS)
+        log(self.logger, self.robot, range(8))
+        self.logger.stopLogging()
+        self.assertLogged(range(4, 8))
+
+    def testScalarChannels(self):
+        self.logger.startLogging(LOGGED_FLAGS)
+        log(self.logger, self.robot, range(5))
+        self.logger.stopLogging()
+        self.assertEqual(self.logger.gripper_width.shape, (5,))
+        self.assertEqual(self.logger.des_finger_pos.shape, (5,))
+        self.assertEqual(self.logger.time_stamp.shape, (5,))
+        self.assertEqual(self.logger.joint_pos.shape, (5, 7))
+
+    def testWidenDimension(self):
+        self.logger.startLogging(LOGGED_FLAGS)
+        log(self.logger, self.robot, range(6))
+        self.robot.uff_dim = 4
+        log(self.logger, self.robot, range(6, 9))
+        self.logger.stopLogging()
+
+        uff = self.logger.uff
+        self.assertEqual(uff.shape, (9, 4))
+        np.testing.assert_array_equal(uff[:6, :2], np.repeat(np.arange(6.)[:, None], 2, axis=1))
+        self.assertTrue(np.all(np.isnan(uff[:6, 2:])))
+        np.testing.assert_array_equal(uff[6:], np.repeat(np.arange(6., 9.)[:, None], 4, axis=1))
+
+    def testRestart(self):
+        self.logger.startLogging(LOGGED_FLAGS)
+        log(self.logger, self.robot, range(5))
+        self.logger.stopLogging()
+        first_run = self.logger.joint_pos
+
+        self.logger.startLogging(LOGGED_FLAGS)
+        log(self.logger, self.robot, range(20, 23))
+        self.logger.stopLogging()
+        self.assertLogged(range(20, 23))
+        np.testing.assert_array_equal(first_run[:, 0], np.arange(5))
+
+
+class TestStreamingLogSink(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmp_dir.name, 'run')
+        self.robot = StubRobot()
+        self.logger = RobotLogger(self.robot)
+        self.logger.attachSink(StreamingLogSink(self.directory, chunkSize=4))
+
+    def tearDown(self) -> None:
+        # the memory maps have to be released before the files are removed
+        for name in ('joint_pos', 'des_joint_pos', 'gripper_width', 'des_finger_pos', 'uff', 'time_stamp'):
+            self.logger.__dict__.pop(name, None)
+        self.tmp_dir.cleanup()
+
+    def assertStreamed(self, time_steps):
+        time_steps = np.asarray(time_steps)
+        np.testing.assert_array_equal(self.logger.joint_pos, time_steps[:, None] + np.arange(7) / 10)
+        np.testing.assert_array_equal(self.logger.gripper_width, time_steps)
+        np.testing.assert_array_equal(self.logger.uff, np.repeat(time_steps[:, None], 2, axis=1))
+        np.testing.assert_allclose(self.logger.time_stamp, 0.1 * time_steps)
+
+    def testRoundTrip(self):
+        # two full chunks and a remainder of two samples which is flushed in stopLogging
+        self.logger.startLogging(LOGGED_FLAGS)
+        log(self.logger, self.robot, range(10))
+        self.assertEqual(self.logger._capacity, 4)
+        self.logger.stopLogging()
+        self.assertStreamed(range(10))
+
+        reader = LogReader(self.directory)
+        self.assertEqual(reader.header['num_samples'], 10)
+        self.assertTrue(reader.channels['gripper_width']['scalar'])
+        self.assertFalse(reader.channels['joint_pos']['scalar'])
+        self.assertEqual(reader['joint_pos'].shape, (10, 7))
+        self.assertNotIn('cart_pos', reader)
+
+    def testFullChunksOnly(self):
+        self.logger.startLogging(LOGGED_FLAGS)
+        log(self.logger, self.robot, range(8))
+        self.logger.stopLogging()
+        self.assertStreamed(range(8))
+        self.assertEqual(LogReader(self.directory).header['num_samples'], 8)
+
+    def testFewerSamplesThanChunk(self):
+        self.logger.startLogging(LOGGED_FLAGS)
+        log(self.logger, self.robot, range(3))
+        self.logger.stopLogging()
+        self.assertStreamed(range(3))
@@ -2,16 +2,23 @@ import mujoco_py
 import numpy as np
 
 from classic_framework import RobotBase
+from classic_framework.controllers.Controller import copy_to_robot
 from classic_framework.controllers.TrajectoryTracking import GotoCartPosQuatImpedanceController
 from classic_framework.controllers.TrajectoryTracking import GotoCartPosQuatPlanningController
 from classic_framework.controllers.TrajectoryTracking import GotoJointController
 from classic_framework.controllers.TrajectoryTracking import JointTrajectoryTracker
 from classic_framework.interface.FictiveRobot import FictiveRobot
 from classic_framework.mujoco.mujoco_utils.mujoco_helpers import reset_mocap2body_xpos
+from classic_framework.mujoco.mujoco_utils.mujoco_sim_state import MujocoStateLayout
 from classic_framework.utils.sim_path import sim_framework_path
 
 
 class MujocoRobot(RobotBase):
+    # controller state of the robot which is part of a snapshot in addition to the simulation state
+    SNAPSHOT_SCALARS = ('time_stamp', 'counter', 'initCounter', 'num_calls', 'set_gripper_width')
+    SNAPSHOT_ARRAYS = ('command', 'des_joint_pos', 'des_joint_vel', 'des_c_pos', 'des_c_vel', 'des_quat',
+                       'des_quat_vel', 'des_fing_pos')
+
     def __init__(self, scene, config_path=None, gravity_comp=True, clip_actions=False, num_DoF=7):
         if config_path is None:
             config_path = sim_framework_path('./classic_framework/controllers/Config/Mujoco/Standard')
@@ -39,6 +46,19 @@ class MujocoRobot(RobotBase):
 
         self.jointTrajectoryTracker = JointTrajectoryTracker(self.dt)
 
+        self._state_layout = None
+        self._snapshot_slices = None
+
+        # qpos / qvel addresses of the arm and finger joints
+        self.joint_qpos_idx = np.array([self.model.get_joint_qpos_addr(name) for name in self.scene.joint_names])
+        self.joint_qvel_idx = np.array([self.model.get_joint_qvel_addr(name) for name in self.scene.joint_names])
+        self.fing_qpos_idx = np.array([self.model.get_joint_qpos_addr(name) for name in self.scene.gripper_names])
+        self.fing_qvel_idx = np.array([self.model.get_joint_qvel_addr(name) for name in self.scene.gripper_names])
+        self.tcp_body_id = self.model.body_name2id('tcp')
+        self._tcp_jacp = np.zeros(3 * self.model.nv)
+        self._tcp_jacr = np.zeros(3 * self.model.nv)
+        self._tcp_jacobian = None
+
         # self.mocap_setup = None
         self.reset()
 
@@ -53,6 +73,64 @@ class MujocoRobot(RobotBase):
         self.mocap_setup = None
         self.receiveState()
 
+    def getStateLayout(self):
+        """
+        Returns the layout of the snapshots, which is created on the first call. Besides the simulation state it
+        contains SNAPSHOT_SCALARS and SNAPSHOT_ARRAYS of the robot.
+
+        :return: :class:`MujocoStateLayout`
+        """
+        if self._state_layout is None:
+            offset = len(self.SNAPSHOT_SCALARS)
+            self._snapshot_slices = []
+            for name in self.SNAPSHOT_ARRAYS:
+                size = np.size(getattr(self, name))
+                self._snapshot_slices.append((name, slice(offset, offset + size)))
+                offset += size
+            self._state_layout = MujocoStateLayout(self.model, extra_size=offset)
+        return self._state_layout
+
+    def snapshot(self, out=None):
+        """
+        Captures the simulation state (see :class:`MujocoStateLayout`) and the controller state of the robot (time
+        stamp, counters, commands and set points) into a flat buffer.
+
+        :param out: buffer returned by a previous call which is overwritten; if None, a new buffer is allocated
+        :return: numpy array with the snapshot
+        """
+        layout = self.getStateLayout()
+        out = layout.snapshot(self.sim, out)
+        extra = layout.extra(out)
+        for i, name in enumerate(self.SNAPSHOT_SCALARS):
+            extra[i] = getattr(self, name)
+        for name, idx in self._snapshot_slices:
+            extra[idx] = getattr(self, name)
+        return out
+
+    def restore(self, state):
+        """
+        Restores a snapshot created by :func:`snapshot`. Trajectories of running controllers are not part of the
+        snapshot.
+
+        :param state: buffer returned by :func:`snapshot`
+        :return: no return value
+        """
+        layout = self.getStateLayout()
+        if np.shape(state) != (layout.size,):
+            raise ValueError("Error, the snapshot has shape " + str(np.shape(state)) + ", expected (" +
+                             str(layout.size) + ",). Was it created by snapshot() of a robot with the same model?")
+        layout.restore(self.sim, state)
+        extra = layout.extra(state)
+        self.time_stamp = float(extra[0])
+        self.counter = int(extra[1])
+        self.initCounter = int(extra[2])
+        self.num_calls = int(extra[3])
+        self.set_gripper_width = float(extra[4])
+        for name, idx in self._snapshot_slices:
+            # the set points may be shared with the controllers, hence they are replaced instead of overwritten
+            setattr(self, name, extra[idx].copy())
+        self.receiveState()
+
     def getJacobian(self, q=None):
         """
         Getter for the jacobian matrix.
@@ -87,6 +165,16 @@ class MujocoRobot(RobotBase):
             # 		BUT: IT is not!!! why?
         return jac
 
+    def computeCurrentJacobian(self):
+        """
+        Returns the jacobian computed in :func:`receiveState`.
+
+        :return: jacobian matrix (6x7)
+        """
+        if self._tcp_jacobian is None:
+            return self.getJacobian()
+        return self._tcp_jacobian
+
     def getForwardKinematics(self, q=None):
         if q is not None:
             # first copy current simulation state
@@ -132,23 +220,114 @@ class MujocoRobot(RobotBase):
         # self.des_quat = np.zeros((4,)) * np.nan
         # self.des_quat_vel = np.zeros((4,)) * np.nan
 
-    def receiveState(self):
+    def follow_JointTrajFastForward(self, desiredTraj, gains=None, blockSize=100):
+        """
+        Headless variant of :func:`follow_JointTraj` for data generation, see :func:`advanceJointTrajectory`.
+
+        :param desiredTraj: numpy array (num_time_stamps, num_joints) sampled with dt, or a Trajectory object
+        :param gains: dict with pgain and dgain, None for the default gains
+        :param blockSize: number of time steps between two state updates of the robot
+        :return: no return value
+        """
+        if gains is None:  # use default gains
+            data = self.config.load_gains('PD_control_gains')
+            pgain = data['pgain']
+            dgain = data['dgain']
+        else:  # use specified gains
+            pgain = gains['pgain']
+            dgain = gains['dgain']
+        self.jointTrajectoryTracker.trackingController.setGains(pgain, dgain)
+        self.jointTrajectoryTracker.setTrajectory(trajectory=desiredTraj)
+        self.jointTrajectoryTracker.executeFastForward(self, maxDuration=self.jointTrajectoryTracker.reference.duration,
+                                                       blockSize=blockSize)
+
+    def advanceJointTrajectory(self, des_joint_pos, des_joint_vel, des_joint_acc, pgain, dgain):
+        """
+        Fast-forward for headless execution of joint trajectories. Simulates one time step per row of the set points
+        with the joint PD controller and gravity compensation (as :func:`nextStep` with a JointPDController would),
+        but computes the torques directly from sim.data.qpos / qvel. The robot state is only received, logged and
+        rendered once at the end of the block, so intermediate states are not available.
+
+        :param des_joint_pos: desired joint positions [num_steps, num_joints]
+        :param des_joint_vel: desired joint velocities [num_steps, num_joints]
+        :param des_joint_acc: desired joint accelerations [num_steps, num_joints]
+        :param pgain: p gains of the PD controller (num_joints,)
+        :param dgain: d gains of the PD controller (num_joints,)
+        :return: no return value
+        """
+        if self.use_inv_dyn or self.clip_rate:
+            raise ValueError("Error, fast forward does not support inverse dynamics and rate limits.")
+
+        data = self.sim.data
+        num_steps = des_joint_pos.shape[0]
+        error = np.zeros(self.num_DoF)
+        target_j_acc = np.zeros(self.num_DoF)
+        uff = np.zeros(self.num_DoF + 2)
+
+        for k in range(num_steps):
+            np.subtract(des_joint_pos[k], data.qpos[self.joint_qpos_idx], out=error)
+            np.multiply(pgain, error, out=target_j_acc)
+            np.subtract(des_joint_vel[k], data.qvel[self.joint_qvel_idx], out=error)
+            error *= dgain
+            target_j_acc += error
+            target_j_acc += des_joint_acc[k]
+
+            self.current_fing_pos = data.qpos[self.fing_qpos_idx]
+            self.current_fing_vel = data.qvel[self.fing_qvel_idx]
+            uff[:self.num_DoF] = target_j_acc
+            uff[self.num_DoF:] = self.fing_ctrl_step()
+            if self.gravity_comp:
+                uff += data.qfrc_bias[:self.num_DoF + 2]
+            if self.clip_actions:
+                np.clip(uff[:self.num_DoF], -self.torque_limit, self.torque_limit, out=uff[:self.num_DoF])
+            data.ctrl[:] = uff
 
-        # joints
-        self.current_j_pos = np.array([self.sim.data.get_joint_qpos(name) for name in self.scene.joint_names].copy())
-        self.current_j_vel = np.array([self.sim.data.get_joint_qvel(name) for name in self.scene.joint_names].copy())
+            try:
+                self.sim.step()
+            except Exception:
+                print("Simulation step could not be executed")
 
-        # end effector/tip
-        self.current_c_pos = self.sim.data.get_body_xpos('tcp').copy()
-        self.current_c_vel = self.sim.data.get_body_xvelp('tcp').copy()
-        self.current_c_quat = self.sim.data.get_body_xquat('tcp').copy()  # [w, x, y, z]
+        self.command = target_j_acc
+        self.uff = uff
+        copy_to_robot(self, 'des_joint_pos', des_joint_pos[-1])
+        copy_to_robot(self, 'des_joint_vel', des_joint_vel[-1])
+        copy_to_robot(self, 'des_joint_acc', des_joint_acc[-1])
+
+        self.num_calls += num_steps
+        self.initCounter += num_steps
+        self.counter += num_steps
+        self.time_stamp += num_steps * self.dt
+
+        if self.render:
+            self.viewer.render()
+        if self.logger.isLogging:
+            self.logger.logData()
+        self.receiveState()
+
+    def receiveState(self):
+        data = self.sim.data
+
+        # joints (fancy indexing returns copies, so the state of the previous time step can still be kept by users)
+        self.current_j_pos = data.qpos[self.joint_qpos_idx]
+        self.current_j_vel = data.qvel[self.joint_qvel_idx]
+
+        # end effector/tip; the velocities are J * qvel as in get_body_xvelp / get_body_xvelr
+        self.functions.mj_jacBody(self.model, data, self._tcp_jacp, self._tcp_jacr, self.tcp_body_id)
+        jacp = self._tcp_jacp.reshape((3, -1))
+        jacr = self._tcp_jacr.reshape((3, -1))
+        self.current_c_pos = data.xpos[self.tcp_body_id].copy()
+        self.current_c_vel = jacp.dot(data.qvel)
+        self.current_c_quat = data.xquat[self.tcp_body_id].copy()  # [w, x, y, z]
         self.current_c_quat_vel = np.zeros(4)
-        self.current_c_quat_vel[1:] = self.sim.data.get_body_xvelr('tcp').copy()
+        self.current_c_quat_vel[1:] = jacr.dot(data.qvel)
         self.current_c_quat_vel *= 0.5 * self.current_c_quat
 
+        # the jacobian of this state is reused by getCachedJacobian
+        self._tcp_jacobian = np.concatenate((jacp[:, :7], jacr[:, :7]), axis=0)
+
         # fingers
-        self.current_fing_pos = [self.sim.data.get_joint_qpos(j_name) for j_name in self.scene.gripper_names]
-        self.current_fing_vel = [self.sim.data.get_joint_qvel(j_name) for j_name in self.scene.gripper_names]
+        self.current_fing_pos = data.qpos[self.fing_qpos_idx]
+        self.current_fing_vel = data.qvel[self.fing_qvel_idx]
         self.gripper_width = self.current_fing_pos[-2] + self.current_fing_pos[-1]
 
         # self.des_joint_pos = np.zeros((self.num_DoF,)) * np.nan
@@ -1,7 +1,5 @@
-import os
-
 import numpy as np
-from mujoco_py import MjSim, MjViewer, load_model_from_path, MjSimState
+from mujoco_py import MjSim, MjViewer, MjSimState
 
 from classic_framework.interface.Scene import Scene
 from classic_framework.mujoco.Mujoco_Camera import Camera
@@ -127,22 +125,16 @@ class MujocoScene(Scene):
             No return value
         """
 
-        xml_path = sim_framework_path('./envs/mujoco/panda/main_scene.xml')
-
         # xml_path = sim_framework_path('./envs/mujoco/panda/panda_with_cam_original_inertia.xml')
         # ik control with orientation
         # has problems when using PD control,
         # when using inv dynamics control, works very good
 
         # adding all assets to the scene
-        for obj in self.object_list:
-            if isinstance(obj, MujocoLoadable):
-                self.xml_parser.load_mj_loadable(obj)
+        self.xml_parser.add_many(self.object_list)
+        self.xml_parser.add_many(self.camera_list)
 
-        for cam in self.camera_list:
-            self.xml_parser.load_mj_loadable(cam)
-
-        model = load_model_from_path(xml_path)
+        model = self.xml_parser.compile()
         self.sim = MjSim(model=model, nsubsteps=self.n_substeps)
 
         self.geom_to_idx = mj_help.get_geom_to_idx_dict(model=model)
@@ -152,8 +144,6 @@ class MujocoScene(Scene):
 
         self.load_panda_to_scene()
 
-        os.remove(xml_path)  # remove the created xml file after creating the scene
-
         # Show simulation
         self.viewer = None
         if self.render:
@@ -266,7 +256,7 @@ class MujocoScene(Scene):
     def get_rgb_image_from_cam(self, cam_name, width=None, height=None):
         assert self.cameras.get(cam_name,
                                 None), "Error, there exists no camera with the specified name."
-        return self.cameras[cam_name].get_image(width=width, height=height)[0]
+        return self.cameras[cam_name].get_image(width=width, height=height, depth=False)
 
     def get_point_cloud_from_cam(self, cam_name):
         assert self.cameras.get(cam_name,
@@ -18,10 +18,49 @@ class Camera:
         self.near = self.sim.model.vis.map.znear * self.sim.model.stat.extent # as specified in xml file
         self.far = self.sim.model.vis.map.zfar * self.sim.model.stat.extent
 
-        self.fx = (self.width / 2) / (np.tan(self.fovy * np.pi / 180 / 2))
-        self.fy = (self.height / 2) / (np.tan(self.fovy * np.pi / 180 / 2))
-        self.cx = self.width / 2
-        self.cy = self.width / 2
+        self.fx, self.fy, self.cx, self.cy = self.get_intrinsics(self.width, self.height)
+
+        # created on first use, since creating it while the scene is set up does not work
+        self._render_context = None
+        # normalized pixel coordinates (u - cx) / fx and (v - cy) / fy of the point clouds for each image size
+        self._pixel_coordinates = {}
+
+    def get_render_context(self):
+        """
+        Returns the render context of the camera, which is created on the first call and reused afterwards. Creating a
+        new context for every image allocates new GL buffers (and registers another context at the simulation) in
+        every call.
+
+        :return: mujoco_py.MjRenderContext
+        """
+        if self._render_context is None:
+            self._render_context = mujoco_py.MjRenderContext(self.sim)  # does th same without opening new window
+        return self._render_context
+
+    def get_intrinsics(self, width, height):
+        """
+        Returns the focal lengths and the principal point (in pixels) of an image of the given size. fovy is the vertical
+        field of view and MuJoCo renders square pixels, so both focal lengths are derived from the height.
+
+        :return: fx, fy, cx, cy
+        """
+        f = (height / 2) / (np.tan(self.fovy * np.pi / 180 / 2))
+        return f, f, width / 2, height / 2
+
+    def get_pixel_coordinates(self, width, height):
+        """
+        Returns the normalized pixel coordinates (u - cx) / fx for the columns and (v - cy) / fy for the rows of an
+        image of the given size, which are computed once per image size.
+
+        :return: numpy arrays (width,) and (height, 1)
+        """
+        key = (width, height)
+        if key not in self._pixel_coordinates:
+            fx, fy, cx, cy = self.get_intrinsics(width, height)
+            u = (np.arange(width) - cx) / fx
+            v = (np.arange(height) - cy) / fy
+            self._pixel_coordinates[key] = (u, v.reshape((height, 1)))
+        return self._pixel_coordinates[key]
 
     # def set_fov(self):
     #     self.sim.model.cam_fovy[self.sim.model._camera_name2id[self.name]] = self.fov
@@ -34,12 +73,18 @@ class Camera:
             height = self.height
 
         id = self.sim.model._camera_name2id[self.name]
-        viewer = mujoco_py.MjRenderContext(self.sim)  # does th same without opening new window
+        viewer = self.get_render_context()
         viewer.render(width, height, id, segmentation=True)
         data = viewer.read_pixels(width, height, depth=False, segmentation=True)[:, :, 1]
         return data
 
     def get_image(self, width=None, height=None, depth=True):
+        """
+        Renders the camera image. RGB and depth image are rendered and read in a single pass.
+
+        :param depth: whether the depth image is read as well
+        :return: rgb image (height x width x 3) and depth image (height x width) if depth is True, else the rgb image
+        """
         if width is None:
             width = self.width
         if height is None:
@@ -48,29 +93,31 @@ class Camera:
         id = self.sim.model._camera_name2id[self.name]
 
         # viewer = mujoco_py.MjRenderContextOffscreen(self.sim, id)         # leads to open new gflw window :(
-        # TODO: put into class constructor. Did not work when tried
-        viewer = mujoco_py.MjRenderContext(self.sim)                        # does th same without opening new window
+        viewer = self.get_render_context()
         viewer.render(width, height, id)
-        data = viewer.read_pixels(width, height, depth=True)
-        rgb_img = data[0]
         if depth:
-            depth_img = data[1]
+            rgb_img, depth_img = viewer.read_pixels(width, height, depth=True)
             return rgb_img, depth_img
         else:
-            return rgb_img
+            return viewer.read_pixels(width, height, depth=False)
 
     def calc_point_cloud(self, width=None, height=None):
+        if width is None:
+            width = self.width
+        if height is None:
+            height = self.height
 
         rgb_img, depth_img = self.get_image(width, height)
-        z = 2 * self.far * self.near / (self.far + self.near - (self.far - self.near) * (2 * np.array(depth_img) - 1))
 
-        u = np.arange(self.width) - self.cx
-        v = np.arange(self.height) - self.cy
+        points = np.empty((height, width, 3))
+        z = points[:, :, 2]
+        z[:] = 2 * self.far * self.near / (self.far + self.near - (self.far - self.near) * (2 * depth_img - 1))
 
-        x = (z * u) / self.fx
-        y = (z.T * v).T / self.fy
+        u, v = self.get_pixel_coordinates(width, height)
+        np.multiply(z, u, out=points[:, :, 0])
+        np.multiply(z, v, out=points[:, :, 1])
 
-        points = np.stack((x, y, z), axis=-1).reshape((self.width * self.height, 3))
-        colors = rgb_img.reshape((self.width * self.height, 3)) / 255
+        points = points.reshape((width * height, 3))
+        colors = rgb_img.reshape((width * height, 3)) / 255
 
         return points, colors
@@ -1,3 +1,5 @@
 from .mujoco_helpers import *
+from .mujoco_model_cache import *
 from .mujoco_scene_object import *
 from .mujoco_scene_parser import *
+from .mujoco_sim_state import *
@@ -0,0 +1,178 @@
+import collections
+import hashlib
+import os
+import tempfile
+import threading
+import xml.etree.ElementTree as Et
+
+from mujoco_py import load_model_from_mjb
+
+
+def referenced_files(root: Et.Element, xml_dir: str):
+    """
+    Collects all files a model depends on, i.e. (nested) included xml files as well as mesh, skin, texture and
+    height field files. As in MuJoCo, includes are resolved relative to the directory of the main model file and
+    assets relative to the meshdir / texturedir of the compiler.
+
+    Args:
+        root: root element of the model
+        xml_dir: directory of the main model file
+
+    Returns:
+        set with the absolute paths of the referenced files
+    """
+    files = set()
+    assets = []
+    compiler = {}
+    stack = [root]
+    while stack:
+        for node in stack.pop().iter():
+            if node.tag == 'compiler':
+                compiler.update(node.attrib)
+            file = node.get('file')
+            if file is None:
+                continue
+            if node.tag == 'include':
+                path = os.path.normpath(os.path.join(xml_dir, file))
+                if path not in files:
+                    files.add(path)
+                    try:
+                        stack.append(Et.parse(path).getroot())
+                    except (OSError, Et.ParseError):
+                        pass  # MuJoCo reports the broken include when the model is compiled
+            else:
+                assets.append((node.tag, file))
+
+    for tag, file in assets:
+        if tag in ('mesh', 'skin'):
+            asset_dir = compiler.get('meshdir', '')
+        elif tag in ('texture', 'hfield'):
+            asset_dir = compiler.get('texturedir', '')
+        else:
+            asset_dir = ''
+        files.add(os.path.normpath(os.path.join(xml_dir, asset_dir, file)))
+    return files
+
+
+class MujocoModelCache:
+    """
+    Cache for compiled MuJoCo models. A model is identified by the hash of its xml, the directory the xml is compiled
+    in and the modification times of all referenced files (see :func:`referenced_files`). The compiled models are kept
+    as binary models (MJB) in an in-process LRU cache and optionally in a directory on disk, which can be shared
+    between processes and runs.
+
+    Every lookup returns a new model instance since the models are modified by the environments (e.g. body positions
+    or equality constraints).
+    """
+
+    def __init__(self, maxsize=32, cache_dir=None):
+        """
+        Args:
+            maxsize:
+                Maximum number of models kept in memory
+            cache_dir:
+                Directory for the .mjb files. If None, models are only cached in memory.
+        """
+        self.maxsize = maxsize
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._models = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, xml_string, xml_dir):
+        """
+        Args:
+            xml_string: serialized model (bytes or str)
+            xml_dir: directory the model is compiled in
+
+        Returns:
+            hex digest identifying the compiled model
+        """
+        if isinstance(xml_string, str):
+            xml_string = xml_string.encode()
+        key = hashlib.sha1()
+        key.update(os.path.abspath(xml_dir).encode())
+        key.update(xml_string)
+        for path in sorted(referenced_files(Et.fromstring(xml_string), xml_dir)):
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                mtime = -1
+            key.update('{}:{}'.format(path, mtime).encode())
+        return key.hexdigest()
+
+    def get(self, key):
+        """
+        Returns:
+            a new model instance for the key or None if the model is not cached
+        """
+        with self._lock:
+            mjb = self._models.get(key)
+            if mjb is not None:
+                self._models.move_to_end(key)
+
+        if mjb is None and self.cache_dir is not None:
+            try:
+                with open(self._mjb_path(key), 'rb') as f:
+                    mjb = f.read()
+                self._store(key, mjb)
+            except OSError:
+                pass
+
+        with self._lock:
+            if mjb is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return load_model_from_mjb(mjb)
+
+    def put(self, key, model):
+        """
+        Stores the compiled model. Has to be called before the model is modified.
+        """
+        mjb = model.get_mjb()
+        self._store(key, mjb)
+        if self.cache_dir is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # write to a temporary file first such that other processes never read a partially written model
+            fd, tmp_path = tempfile.mkstemp(suffix='.mjb.tmp', dir=self.cache_dir)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(mjb)
+            os.replace(tmp_path, self._mjb_path(key))
+
+    def get_or_compile(self, xml_string, xml_dir, compile_fn):
+        """
+        Args:
+            xml_string: serialized model (bytes or str)
+            xml_dir: directory the model is compiled in
+            compile_fn: function without arguments which compiles the model on a cache miss
+
+        Returns:
+            mujoco_py.PyMjModel
+        """
+        key = self.key(xml_string, xml_dir)
+        model = self.get(key)
+        if model is None:
+            model = compile_fn()
+            self.put(key, model)
+        return model
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def _store(self, key, mjb):
+        with self._lock:
+            self._models[key] = mjb
+            self._models.move_to_end(key)
+            while len(self._models) > self.maxsize:
+                self._models.popitem(last=False)
+
+    def _mjb_path(self, key):
+        return os.path.join(self.cache_dir, key + '.mjb')
+
+
+model_cache = MujocoModelCache()
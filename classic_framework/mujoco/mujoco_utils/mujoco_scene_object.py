@@ -20,7 +20,8 @@ class MujocoLoadable(abc.ABC):
             scene_dir: Directory of the scene XML. Used to built relative paths for <include /> nodes
 
         Returns:
-            XML Element, bool if it is an include element.
+            XML Element, bool if it is an include element. Elements which are flagged as include but are not an
+            <include /> node (e.g. a parsed <mujoco> file) are merged into the scene like an included file.
         """
         raise NotImplementedError
 
@@ -169,11 +170,8 @@ class MujocoObject(MujocoLoadable):
         body.set('pos', obj_pos_str)
         body.set('quat', obj_quat_str)
 
-        obj.write(self.obj_path)
-
-        include = Et.Element('include')
-        include.set('file', os.path.relpath(self.obj_path, scene_dir))
-        return include, True
+        # the modified object is returned instead of being written back to the (shared) asset file
+        return obj.getroot(), True
 
 
 class MujocoCamera(MujocoLoadable):
@@ -1,13 +1,14 @@
 import logging
 import os
+import tempfile
 import xml.etree.ElementTree as Et
-from shutil import copyfile
 from xml.etree.ElementTree import Element
 from xml.etree.ElementTree import SubElement
 
 from mujoco_py import load_model_from_path, MjSim
 
 from classic_framework.mujoco.mujoco_utils.mujoco_controllers import MujocoController
+from classic_framework.mujoco.mujoco_utils.mujoco_model_cache import model_cache
 from classic_framework.mujoco.mujoco_utils.mujoco_scene_object import MujocoLoadable
 from classic_framework.utils.sim_path import sim_framework_path
 
@@ -16,27 +17,46 @@ class MujocoSceneParser:
     """
     Class for parsing assets to the xml file for setting up the scene for a mujoco environment.
     New created assets are written at the end of the worldbody element which specifies the assets in the environment.
+
+    The scene is assembled in memory. Only when the model is compiled, the scene is written to a temporary file with a
+    unique name next to the robot xml file (such that relative includes and mesh paths stay valid) which is removed
+    directly afterwards. Hence, several scenes can be constructed at the same time by different threads or processes.
     """
 
     def __init__(self, panda_xml_path='./envs/mujoco/panda/panda_with_cam_mujoco.xml'):
 
         src = sim_framework_path(panda_xml_path)
-        self.scene_xml = sim_framework_path('./envs/mujoco/panda/main_scene.xml')
-        copyfile(src, self.scene_xml)
-        self._xml_path = sim_framework_path('./envs/mujoco/panda/')
-        self._tree = Et.parse(sim_framework_path(self._xml_path, 'main_scene.xml'))
+        self._xml_path = os.path.dirname(src)
+        self._tree = Et.parse(src)
         self._root = self._tree.getroot()
         self._worldbody = self._root.find('worldbody')
         assert self._worldbody, 'Error, xml file does contain a world body.'
 
     def load_mj_loadable(self, mj_loadable: MujocoLoadable):
         xml_element, include = mj_loadable.to_xml(self._xml_path)
-        if include:
+        if include and xml_element.tag != 'include':
+            # parsed xml file (e.g. a <mujoco> element), its sections are merged into the scene like an include
+            for child in xml_element:
+                self._root.append(child)
+        elif include:
             self._root.append(xml_element)
         else:
             self._worldbody.append(xml_element)  # append the new object to the worldbody of the xml file
-        self.indent(self._root)  # ensures correct indendation
-        self._tree.write(sim_framework_path(self._xml_path, 'main_scene.xml'))  # writes the changes to the file
+
+    def add_many(self, mj_loadables):
+        """
+        Adds several objects to the scene in one pass. Entries which are not a :class:`MujocoLoadable` are skipped.
+        The scene is only serialized once it is compiled, see :func:`compile`.
+
+        Args:
+            mj_loadables: iterable of :class:`MujocoLoadable`
+
+        Returns:
+            No return value
+        """
+        for mj_loadable in mj_loadables:
+            if isinstance(mj_loadable, MujocoLoadable):
+                self.load_mj_loadable(mj_loadable)
 
     def set_control(self, control, set_gripper=True, gripper_ctrl=None, kv=None, kv_scale=1, kp=None, kp_scale=1):
         if isinstance(control, MujocoController):
@@ -83,15 +103,11 @@ class MujocoSceneParser:
 
         elif control_name == 'position':  # position control
             self.set_kp(kp=kp, scale=kp_scale)
-            include.set('file', './controller/panda_position_control.xml')
-            self._root.append(include)
             if gripper_ctrl is None:
                 gripper_ctrl = 'ik'
 
         elif control_name == 'velocity':  # joint velocity control
             self.set_kv(kv=kv, scale=kv_scale)
-            include.set('file', './controller/panda_velocity_control.xml')
-            self._root.append(include)
             if gripper_ctrl is None:
                 gripper_ctrl = 'ik'
 
@@ -109,9 +125,6 @@ class MujocoSceneParser:
         if set_gripper:
             self.set_gripper_control(control=gripper_ctrl)
 
-        self.indent(self._root)  # ensures correct indentation
-        self._tree.write(sim_framework_path(self._xml_path, 'main_scene.xml'))  # writes the changes to the file
-
     def set_gripper_control(self, control, kv=None, kv_scale=20, kp=None, kp_scale=1):
         if control.lower() == 'none':
             return
@@ -168,13 +181,11 @@ class MujocoSceneParser:
         # left_gripper.set('forcelimited', "true")
 
         self._root.append(gripper_ctrl)
-        self.indent(self._root)  # ensures correct indentation
-        self._tree.write(sim_framework_path(self._xml_path, 'main_scene.xml'))  # writes the changes to the file
 
     def set_kp(self, kp=None, scale=1):
         """
-        Sets the position feedback gain for joint position control by writing the specified values to
-        "panda_position_control.xml".
+        Adds the joint position actuators of "controller/panda_position_control.xml" with the specified position
+        feedback gains to the scene. The controller file itself is not modified.
 
         Args:
             kp: Position feedback gain
@@ -189,19 +200,19 @@ class MujocoSceneParser:
             assert len(kp) == 7, ("Error, the number of entries in <kp> has to match the number of joints (i.e. 7). "
                                   "Given: ", len(kp))
 
-        tree = Et.parse(sim_framework_path(self._xml_path, 'panda_position_control.xml'))
-        root = tree.getroot()
+        root = Et.parse(sim_framework_path('./envs/mujoco/panda/controller/panda_position_control.xml')).getroot()
         positions = root.find('actuator').findall('position')
 
         for i, pos in enumerate(positions):
             pos.set('kp', str(scale * kp[i]))
 
-        tree.write(sim_framework_path(self._xml_path, 'panda_position_control.xml'))
+        for child in root:
+            self._root.append(child)
 
     def set_kv(self, kv=None, scale=1):
         """
-        Sets the velocity feedback gain for joint velocity control by writing the specified values to
-        "panda_velocity_control.xml".
+        Adds the joint velocity actuators of "controller/panda_velocity_control.xml" with the specified velocity
+        feedback gains to the scene. The controller file itself is not modified.
 
         Args:
             kv: Velocity feedback gain
@@ -216,14 +227,14 @@ class MujocoSceneParser:
             assert len(kv) == 7, ("Error, the number of entries in <kv> has to match the number of joints (i.e. 7). "
                                   "Given: ", len(kv))
 
-        tree = Et.parse(sim_framework_path(self._xml_path, 'panda_velocity_control.xml'))
-        root = tree.getroot()
+        root = Et.parse(sim_framework_path('./envs/mujoco/panda/controller/panda_velocity_control.xml')).getroot()
         velocities = root.find('actuator').findall('velocity')
 
         for i, vel in enumerate(velocities):
             vel.set('kv', str(scale * kv[i]))
 
-        tree.write(sim_framework_path(self._xml_path, 'panda_velocity_control.xml'))
+        for child in root:
+            self._root.append(child)
 
     def add_mocap(self):
         """
@@ -273,8 +284,6 @@ class MujocoSceneParser:
 
         # Write the defined mocap to the worldbody of the scene
         self._worldbody.append(object_body)  # append the new object to the worldbody of the xml file
-        self.indent(self._root)  # ensures correct indentation
-        self._tree.write(sim_framework_path(self._xml_path, 'main_scene.xml'))  # writes the changes to the file
 
     def set_dt(self, dt=0.001):
         """
@@ -291,8 +300,6 @@ class MujocoSceneParser:
         """
         options = self._root.find('option')
         options.set('timestep', str(dt))
-        self.indent(self._root)  # ensures correct indentation
-        self._tree.write(sim_framework_path(self._xml_path, 'main_scene.xml'))  # writes the changes to the file
 
     def indent(self, elem: Element, level=0):
         """
@@ -315,10 +322,42 @@ class MujocoSceneParser:
             if level and (not elem.tail or not elem.tail.strip()):
                 elem.tail = i
 
-    def create_sim(self, nsubsteps):
-        model = load_model_from_path(self.scene_xml)
+    def compile(self, use_cache=True, cache=None):
+        """
+        Compiles the scene assembled so far. The xml tree is indented and serialized exactly once per call.
+
+        Args:
+            use_cache:
+                If True, the compiled model is looked up in / stored to the cache, so identical scenes are only
+                compiled once.
+            cache:
+                :class:`mujoco_model_cache.MujocoModelCache` to use, e.g. one with a cache_dir for the on-disk cache.
+                If None, the in-memory :data:`mujoco_model_cache.model_cache` is used.
+
+        Returns:
+            mujoco_py.PyMjModel
+        """
+        self.indent(self._root)  # ensures correct indentation
+        xml_string = Et.tostring(self._root)
+        if not use_cache:
+            return self._compile(xml_string)
+        if cache is None:
+            cache = model_cache
+        return cache.get_or_compile(xml_string, self._xml_path, lambda: self._compile(xml_string))
+
+    def _compile(self, xml_string):
+        fd, scene_xml = tempfile.mkstemp(prefix='.scene_', suffix='.xml', dir=self._xml_path)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(xml_string)
+            model = load_model_from_path(scene_xml)
+        finally:
+            os.remove(scene_xml)  # remove the created xml file after compiling the scene
+        return model
+
+    def create_sim(self, nsubsteps, cache=None):
+        model = self.compile(cache=cache)
         sim = MjSim(model=model, nsubsteps=nsubsteps)
-        os.remove(self.scene_xml)
         return sim, model
 
     def set_damping(self, damping):
@@ -328,4 +367,3 @@ class MujocoSceneParser:
                 for atr in default:
                     if atr.tag == 'joint':
                         atr.attrib['damping'] = str(damping)
-        self._tree.write(sim_framework_path(self._xml_path, 'main_scene.xml'))  # writes the changes to the file
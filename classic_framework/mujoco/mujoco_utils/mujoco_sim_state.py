@@ -0,0 +1,102 @@
+import numpy as np
+
+
+class MujocoStateLayout:
+    """
+    Layout of a flat float64 buffer holding everything which is needed to restore a simulation, i.e. the simulation
+    time, qpos, qvel, act, the mocap poses, the warm-start accelerations and the applied controls / forces.
+
+    The layout only depends on the sizes of the model, so one layout can be used for all simulations sharing a model.
+    Snapshots are written into and restored from preallocated buffers, which makes both operations a sequence of
+    plain array copies without any allocation.
+
+    Example:
+        layout = MujocoStateLayout(sim.model)
+        state = layout.snapshot(sim)
+        ...
+        layout.restore(sim, state)
+    """
+
+    FIELDS = ('qpos', 'qvel', 'act', 'mocap_pos', 'mocap_quat', 'qacc_warmstart', 'ctrl', 'qfrc_applied',
+              'xfrc_applied')
+
+    def __init__(self, model, extra_size=0):
+        """
+        Args:
+            model:
+                mujoco_py model of the simulations
+            extra_size:
+                Number of additional entries appended to the buffer, e.g. for the controller state of a robot. They
+                can be accessed via :func:`extra`.
+        """
+        sizes = {'qpos': model.nq,
+                 'qvel': model.nv,
+                 'act': model.na,
+                 'mocap_pos': 3 * model.nmocap,
+                 'mocap_quat': 4 * model.nmocap,
+                 'qacc_warmstart': model.nv,
+                 'ctrl': model.nu,
+                 'qfrc_applied': model.nv,
+                 'xfrc_applied': 6 * model.nbody}
+
+        self.slices = []
+        offset = 1  # the first entry is the simulation time
+        for name in self.FIELDS:
+            if sizes[name] > 0:  # mujoco_py returns None for empty fields (e.g. act if there are no activations)
+                self.slices.append((name, slice(offset, offset + sizes[name])))
+                offset += sizes[name]
+        self.sim_size = offset
+        self.size = offset + extra_size
+
+    def allocate(self):
+        """
+        Returns:
+            buffer for one snapshot
+        """
+        return np.zeros(self.size)
+
+    def extra(self, state):
+        """
+        Returns:
+            view on the additional entries of the snapshot
+        """
+        return state[self.sim_size:]
+
+    def snapshot(self, sim, out=None):
+        """
+        Copies the state of the simulation into a flat buffer.
+
+        Args:
+            sim: mujoco_py.MjSim
+            out: buffer which is overwritten. If None, a new buffer is allocated.
+
+        Returns:
+            the buffer
+        """
+        if out is None:
+            out = self.allocate()
+        data = sim.data
+        out[0] = data.time
+        for name, idx in self.slices:
+            out[idx] = getattr(data, name).reshape(-1)
+        return out
+
+    def restore(self, sim, state, forward=True):
+        """
+        Writes a snapshot back to the simulation.
+
+        Args:
+            sim: mujoco_py.MjSim
+            state: buffer created by :func:`snapshot`
+            forward: if True, the derived quantities (positions of the bodies, contacts, ...) are recomputed
+
+        Returns:
+            No return value
+        """
+        data = sim.data
+        data.time = state[0]
+        for name, idx in self.slices:
+            field = getattr(data, name)
+            field[:] = state[idx].reshape(field.shape)
+        if forward:
+            sim.forward()
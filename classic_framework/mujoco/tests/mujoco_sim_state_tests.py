@@ -0,0 +1,86 @@
+import numpy as np
+from unittest import TestCase
+
+from classic_framework.mujoco.mujoco_utils.mujoco_sim_state import MujocoStateLayout
+
+
+class StubModel:
+    nq = 9
+    nv = 8
+    na = 0
+    nmocap = 1
+    nu = 8
+    nbody = 4
+
+
+class StubData:
+    def __init__(self, model):
+        self.time = 0.0
+        self.qpos = np.zeros(model.nq)
+        self.qvel = np.zeros(model.nv)
+        self.act = None  # mujoco_py returns None for empty fields
+        self.mocap_pos = np.zeros((model.nmocap, 3))
+        self.mocap_quat = np.zeros((model.nmocap, 4))
+        self.qacc_warmstart = np.zeros(model.nv)
+        self.ctrl = np.zeros(model.nu)
+        self.qfrc_applied = np.zeros(model.nv)
+        self.xfrc_applied = np.zeros((model.nbody, 6))
+
+
+class StubSim:
+    def __init__(self):
+        self.model = StubModel()
+        self.data = StubData(self.model)
+        self.num_forward = 0
+
+    def forward(self):
+        self.num_forward += 1
+
+    def randomize(self, rng):
+        data = self.data
+        data.time = rng.uniform()
+        for name, _ in MujocoStateLayout(self.model).slices:
+            getattr(data, name)[:] = rng.normal(size=getattr(data, name).shape)
+
+
+class TestMujocoStateLayout(TestCase):
+    def setUp(self) -> None:
+        self.rng = np.random.RandomState(0)
+        self.sim = StubSim()
+        self.layout = MujocoStateLayout(self.sim.model, extra_size=5)
+
+    def testSize(self):
+        model = self.sim.model
+        sim_size = 1 + model.nq + 3 * model.nv + 7 * model.nmocap + model.nu + 6 * model.nbody
+        self.assertEqual(self.layout.sim_size, sim_size)
+        self.assertEqual(self.layout.size, sim_size + 5)
+        self.assertNotIn('act', [name for name, _ in self.layout.slices])
+
+    def testRoundTrip(self):
+        self.sim.randomize(self.rng)
+        expected = {name: getattr(self.sim.data, name).copy() for name, _ in self.layout.slices}
+        expected_time = self.sim.data.time
+
+        state = self.layout.snapshot(self.sim)
+        self.layout.extra(state)[:] = np.arange(5)
+
+        self.sim.randomize(self.rng)
+        self.layout.restore(self.sim, state)
+
+        self.assertEqual(self.sim.data.time, expected_time)
+        for name, value in expected.items():
+            np.testing.assert_array_equal(getattr(self.sim.data, name), value)
+        np.testing.assert_array_equal(self.layout.extra(state), np.arange(5))
+        self.assertEqual(self.sim.num_forward, 1)
+
+    def testSnapshotIntoBuffer(self):
+        buffer = self.layout.allocate()
+        self.sim.randomize(self.rng)
+        state = self.layout.snapshot(self.sim, buffer)
+        self.assertIs(state, buffer)
+        np.testing.assert_array_equal(state[self.layout.slices[0][1]], self.sim.data.qpos)
+
+    def testRestoreWithoutForward(self):
+        state = self.layout.snapshot(self.sim)
+        self.layout.restore(self.sim, state, forward=False)
+        self.assertEqual(self.sim.num_forward, 0)
@@ -0,0 +1,117 @@
+"""
+This module contains the :class:`AssetRegistry` class which reuses the bodies of a PyBullet physics client instead of
+loading the same URDF / SDF files again.
+"""
+import pybullet as p
+
+
+class AssetRegistry:
+    """
+    Keeps track of the bodies loaded to one physics client. Bodies which are released (e.g. when an object is removed
+    from the scene) are parked: they are made static and moved to parking_position. The next request for the same file
+    and load arguments re-instantiates a parked body with `resetBasePositionAndOrientation` instead of parsing the file
+    and building the collision shapes again.
+
+    Files which are really loaded still go through Bullet's file cache (enableFileCaching of the physics client).
+    """
+
+    def __init__(self, client_id, parking_position=(0.0, 0.0, -100.0)):
+        """
+        :param client_id: id of the physics client
+        :param parking_position: cartesian world position of the released bodies
+        """
+        self.client_id = client_id
+        self.parking_position = list(parking_position)
+
+        self._keys = {}  # body id -> key of the file and load arguments
+        self._masses = {}  # body id -> (mass, inertia diagonal) of the links (-1 is the base) of a parked body
+        self._released = {}  # key -> list of parked body ids (or tuples of ids for SDF files)
+        self._sdf_poses = {}  # body id -> pose of a body in its SDF file
+
+    def load_urdf(self, path_to_urdf, position, orientation, *args, **kwargs):
+        """
+        Returns a body of the URDF file at the given pose. A parked body is reused if there is one for the same file and
+        arguments, otherwise the file is loaded.
+
+        :param path_to_urdf: the whole path of the location of the urdf file
+        :param position: cartesian world position
+        :param orientation: quaternion [x, y, z, w]
+        :param args: further positional arguments of `loadURDF`
+        :param kwargs: further keyword arguments of `loadURDF` (without physicsClientId)
+        :return: body id
+        """
+        key = ('urdf', path_to_urdf, args, tuple(sorted(kwargs.items())))
+        if self._released.get(key):
+            body_id = self._released[key].pop()
+            self._unpark(body_id)
+            p.resetBasePositionAndOrientation(body_id, list(position), list(orientation),
+                                              physicsClientId=self.client_id)
+            return body_id
+
+        body_id = p.loadURDF(path_to_urdf, list(position), list(orientation), *args, physicsClientId=self.client_id,
+                             **kwargs)
+        self._keys[body_id] = key
+        return body_id
+
+    def load_sdf(self, path_to_sdf):
+        """
+        Returns the bodies of the SDF file at the poses given in the file. Parked bodies of the same file are reused if
+        there are any, otherwise the file is loaded.
+
+        :param path_to_sdf: the whole path of the location of the sdf file
+        :return: tuple of body ids
+        """
+        key = ('sdf', path_to_sdf)
+        if self._released.get(key):
+            body_ids = self._released[key].pop()
+            for body_id in body_ids:
+                self._unpark(body_id)
+                position, orientation = self._sdf_poses[body_id]
+                p.resetBasePositionAndOrientation(body_id, position, orientation, physicsClientId=self.client_id)
+            return body_ids
+
+        body_ids = tuple(p.loadSDF(path_to_sdf, physicsClientId=self.client_id))
+        for body_id in body_ids:
+            self._keys[body_id] = key
+            self._sdf_poses[body_id] = p.getBasePositionAndOrientation(body_id, physicsClientId=self.client_id)
+        return body_ids
+
+    def release(self, body_ids):
+        """
+        Parks bodies such that they can be reused. All bodies of an SDF file have to be released together.
+
+        :param body_ids: body id or tuple of body ids returned by :func:`load_urdf` / :func:`load_sdf`
+        :return: no return value
+        """
+        if isinstance(body_ids, tuple):
+            key = self._keys[body_ids[0]]
+        else:
+            key = self._keys[body_ids]
+            body_ids = (body_ids,)
+        for body_id in body_ids:
+            self._park(body_id)
+        self._released.setdefault(key, []).append(body_ids if key[0] == 'sdf' else body_ids[0])
+
+    def is_parked(self, body_id):
+        return body_id in self._masses
+
+    def _park(self, body_id):
+        if body_id in self._masses:
+            raise ValueError("Error, body " + str(body_id) + " is already released.")
+        # static bodies neither fall nor collide with each other at the parking position
+        links = range(-1, p.getNumJoints(body_id, physicsClientId=self.client_id))
+        dynamics = [p.getDynamicsInfo(body_id, link, physicsClientId=self.client_id) for link in links]
+        # the inertia has to be restored as well, changeDynamics recomputes it from the mass otherwise
+        self._masses[body_id] = [(info[0], info[2]) for info in dynamics]
+        for link in links:
+            p.changeDynamics(body_id, link, mass=0, physicsClientId=self.client_id)
+        p.resetBaseVelocity(body_id, [0, 0, 0], [0, 0, 0], physicsClientId=self.client_id)
+        p.resetBasePositionAndOrientation(body_id, self.parking_position, [0, 0, 0, 1], physicsClientId=self.client_id)
+
+    def _unpark(self, body_id):
+        for link, (mass, inertia) in enumerate(self._masses.pop(body_id), start=-1):
+            p.changeDynamics(body_id, link, mass=mass, localInertiaDiagonal=inertia, physicsClientId=self.client_id)
+        p.resetBaseVelocity(body_id, [0, 0, 0], [0, 0, 0], physicsClientId=self.client_id)
+        # a reused body starts like a newly loaded one
+        for joint in range(p.getNumJoints(body_id, physicsClientId=self.client_id)):
+            p.resetJointState(body_id, joint, 0, 0, physicsClientId=self.client_id)
@@ -18,17 +18,25 @@ class PyBulletRobot(RobotBase):
 
         self.pybullet = pybullet
         self.scene = scene
-        self.robot_id, self.robot_id_ik, self.robotEndEffectorIndex = scene.load_panda_to_scene()
-        self.pybullet.setTimeStep(self.dt)
+        self.client_id = scene.physics_client_id  # all calls are routed to the physics client of the scene
+        self.robot_id, _, self.robotEndEffectorIndex = scene.load_panda_to_scene()
+        self.pybullet.setTimeStep(self.dt, physicsClientId=self.client_id)
         self.jointIndices_with_fingers = [1, 2, 3, 4, 5, 6, 7, 10, 11]
         self.pybullet.setJointMotorControlArray(bodyUniqueId=self.robot_id,
                                                 jointIndices=[10, 11],
                                                 controlMode=self.pybullet.VELOCITY_CONTROL,
-                                                forces=[0., 0.])
+                                                forces=[0., 0.],
+                                                physicsClientId=self.client_id)
         self.jointIndices = [1, 2, 3, 4, 5, 6, 7]
+        # snapshot of the joint states of jointIndices_with_fingers, see get_joint_states
+        self._joint_states_q = np.zeros(len(self.jointIndices_with_fingers))
+        self._joint_states_dq = np.zeros(len(self.jointIndices_with_fingers))
+        self._joint_states_forces = np.zeros((len(self.jointIndices_with_fingers), 6))
+        self._joint_states_valid = False
         # enable JointForceTorqueSensor for joints         # maybe enable joint force sensor for gripper here later!!!
         [self.pybullet.enableJointForceTorqueSensor(bodyUniqueId=self.robot_id,
-                                                    jointIndex=jointIndex) for jointIndex in
+                                                    jointIndex=jointIndex,
+                                                    physicsClientId=self.client_id) for jointIndex in
          self.jointIndices_with_fingers]
 
         self.gravity_comp = gravity_comp
@@ -51,12 +59,60 @@ class PyBulletRobot(RobotBase):
         self.receiveState()
         self.publisher = publisher
 
+    @property
+    def robot_id_ik(self):
+        """
+        Id of the robot in the IK client of the scene. The IK client and the robot are only loaded on first access.
+        """
+        return self.scene.robot_ik_client_id
+
     def reset(self):
         # super().reset()
         # self.scene --> how to reset scene in PyBullet ?
         # TODO: reset pybullet scene and robot
         raise NotImplementedError
 
+    def get_joint_states(self, robot_id=None, client_id=None):
+        """
+        Reads position, velocity and reaction forces of all joints in `jointIndices_with_fingers` with a single call
+        to PyBullets `getJointStates`. For the robot and client of this object, the states are stored as a snapshot in
+        preallocated arrays, which serves all joint state getters until the next call of :func:`receiveState`.
+
+        :param robot_id: robot ID returned by calling `loadURDF`
+        :param client_id: ID of the physics client
+        :return: q: joint and finger positions (9,)
+                 dq: joint and finger velocities (9,)
+                 forces: joint and finger reaction forces (9, 6) with [Fx, Fy, Fz, Mx, My, Mz]
+                 The arrays of the snapshot are reused and must not be modified.
+        """
+        own_states = (robot_id is None or robot_id == self.robot_id) and \
+                     (client_id is None or client_id == self.scene.physics_client_id)
+        if own_states and self._joint_states_valid:
+            return self._joint_states_q, self._joint_states_dq, self._joint_states_forces
+
+        if client_id is None:
+            client_id = self.scene.physics_client_id
+        if robot_id is None:
+            robot_id = self.robot_id
+
+        if own_states:
+            q, dq, forces = self._joint_states_q, self._joint_states_dq, self._joint_states_forces
+        else:
+            q = np.zeros(len(self.jointIndices_with_fingers))
+            dq = np.zeros(len(self.jointIndices_with_fingers))
+            forces = np.zeros((len(self.jointIndices_with_fingers), 6))
+
+        states = self.pybullet.getJointStates(bodyUniqueId=robot_id, jointIndices=self.jointIndices_with_fingers,
+                                              physicsClientId=client_id)
+        for i, state in enumerate(states):
+            q[i] = state[0]
+            dq[i] = state[1]
+            forces[i] = state[2]
+
+        if own_states:
+            self._joint_states_valid = True
+        return q, dq, forces
+
     def get_qdq_J(self, robot_id=None, client_id=None):
         """
         This method calculates the joint positions, the joint velocities and the Jacobian.
@@ -66,17 +122,25 @@ class PyBulletRobot(RobotBase):
                 dq: joint velocities
                  J: jacobian matrix (6x7)
         """
+        q, dq, _ = self.get_joint_states(robot_id=robot_id, client_id=client_id)
+        q = q[:7].copy()
+        dq = dq[:7].copy()
+
+        J = self.calc_jacobian(q, robot_id=robot_id, client_id=client_id)
+        return q, dq, J
+
+    def calc_jacobian(self, q, robot_id=None, client_id=None):
+        """
+        This method calculates the Jacobian for the given joint positions without reading the joint states.
+
+        :param q: joint positions (7,)
+        :return: J: jacobian matrix (6x7)
+        """
         if client_id is None:
             client_id = self.scene.physics_client_id
         if robot_id is None:
             robot_id = self.robot_id
 
-        qdq_matrix = np.array([np.array(
-            self.pybullet.getJointState(bodyUniqueId=robot_id, jointIndex=jointIndex, physicsClientId=client_id)[:2])
-            for jointIndex in np.arange(1, 8)])
-        q = qdq_matrix[:, 0]
-        dq = qdq_matrix[:, 1]
-
         # jac_t, jac_r = self.pybullet.calculateJacobian(robot_id, self.robotEndEffectorIndex,
         # 											   [0., 0., 0.1034], list(q) + [0.] * 2, [0.] * 9, [0.] * 9,
         # 											   physicsClientId=client_id)
@@ -84,8 +148,7 @@ class PyBulletRobot(RobotBase):
                                                        [0., 0., 0.0], list(q) + [0.] * 2, [0.] * 9, [0.] * 9,
                                                        physicsClientId=client_id)
 
-        J = np.concatenate((np.array(jac_t)[:, :7], np.array(jac_r)[:, :7]), axis=0)
-        return np.array(q), np.array(dq), J
+        return np.concatenate((np.array(jac_t)[:, :7], np.array(jac_r)[:, :7]), axis=0)
 
     # def test_pinocchio(self, q):
     # 	import pinocchio
@@ -115,16 +178,8 @@ class PyBulletRobot(RobotBase):
         :return: fing_pos: 2x1 position of both fingers as np array
                  fing_vel: 2x1 velocity of both fingers as np array
         """
-        if robot_id is None:
-            robot_id = self.robot_id
-        if client_id is None:
-            client_id = self.scene.physics_client_id
-        f1_info = self.pybullet.getJointState(bodyUniqueId=robot_id, jointIndex=10, physicsClientId=client_id)
-        f2_info = self.pybullet.getJointState(bodyUniqueId=robot_id, jointIndex=11, physicsClientId=client_id)
-
-        fing_pos = np.array([f1_info[0], f2_info[0]])
-        fing_vel = np.array([f1_info[1], f2_info[1]])
-        return fing_pos, fing_vel
+        q, dq, _ = self.get_joint_states(robot_id=robot_id, client_id=client_id)
+        return q[7:9].copy(), dq[7:9].copy()
 
     def get_qdq_joints_fingers(self, robot_id=None, client_id=None):
         """
@@ -133,23 +188,8 @@ class PyBulletRobot(RobotBase):
         :return: joint and finger positions as np array (9x1)
                  joint and finger velocities as np array (9x1)
         """
-        if robot_id is None:
-            robot_id = self.robot_id
-        if client_id is None:
-            client_id = self.scene.physics_client_id
-        qdq_matrix = np.array([np.array(
-            self.pybullet.getJointState(bodyUniqueId=robot_id, jointIndex=jointIndex, physicsClientId=client_id)[:2])
-            for jointIndex in np.arange(1, 8)])
-        q = qdq_matrix[:, 0]
-        dq = qdq_matrix[:, 1]
-        q = list(q)
-        dq = list(dq)
-        q_dq_finger = self.get_qdq_fingers()
-        q.append(q_dq_finger[0][0])
-        q.append(q_dq_finger[0][1])
-        dq.append(q_dq_finger[1][0])
-        dq.append(q_dq_finger[1][1])
-        return np.array(q), np.array(dq)
+        q, dq, _ = self.get_joint_states(robot_id=robot_id, client_id=client_id)
+        return q.copy(), dq.copy()
 
     def get_joint_reaction_forces(self, robot_id=None, client_id=None):
         """
@@ -159,15 +199,8 @@ class PyBulletRobot(RobotBase):
         :param client_id: ID of the physics client
         :return: joint reaction forces (num joints, ) with ||Fx, Fy, Fz|| for each joint
         """
-        if robot_id is None:
-            robot_id = self.robot_id
-        if client_id is None:
-            client_id = self.scene.physics_client_id
-        forces = np.zeros(self.num_DoF)
-        for joint in self.jointIndices:
-            infs = self.pybullet.getJointState(bodyUniqueId=robot_id, jointIndex=joint, physicsClientId=client_id)[2]
-            forces[joint - 1] = np.linalg.norm(np.array(infs[0:3]))
-        return forces
+        _, __, forces = self.get_joint_states(robot_id=robot_id, client_id=client_id)
+        return np.linalg.norm(forces[:self.num_DoF, :3], axis=1)
 
     def get_finger_reaction_forces(self, robot_id=None, client_id=None):
         """
@@ -179,19 +212,11 @@ class PyBulletRobot(RobotBase):
         Note that the init forces of EE without grasping is not 0, we might have to calibrate
         TODO: Check if we get appropriate contact force by moving the robot towards the collision
         """
-        if robot_id is None:
-            robot_id = self.robot_id
-        if client_id is None:
-            client_id = self.scene.physics_client_id
+        _, __, forces = self.get_joint_states(robot_id=robot_id, client_id=client_id)
 
         # only pass through the finger index
-        left_finger_force = self.pybullet.getJointState(bodyUniqueId=robot_id, jointIndex=10, physicsClientId=client_id)[2]
-        right_finger_force = self.pybullet.getJointState(bodyUniqueId=robot_id, jointIndex=11, physicsClientId=client_id)[2]
-
         # compensate the force resulted from grasping
-        forces = np.array(left_finger_force) + np.array(right_finger_force)
-
-        return forces
+        return forces[7] + forces[8]
 
     def get_x(self, robot_id=None, client_id=None):
         """
@@ -276,13 +301,21 @@ class PyBulletRobot(RobotBase):
         _, __, J = self.get_qdq_J()
         return J
 
+    def computeCurrentJacobian(self):
+        """
+        Calculates the jacobian from the joint positions read in :func:`receiveState`, which saves reading the joint
+        states again.
+
+        :return: numpy array; jacobian matrix
+        """
+        return self.calc_jacobian(self.current_j_pos)
+
     def receiveState(self):
         """
         Receives the current state i.e.
-        - joint positions, joint velocities by calling `get_qdq_joints_fingers`
+        - joint and finger positions, velocities and forces by calling `get_joint_states`, which reads them with a
+          single `getJointStates` call
         - cartesian coords, velocity and and orientation of the end-effector by calling `get_x()`
-        - joint forces by calling `get_joint_reaction_forces`
-        - gripper width by calling `getJointState` with finger joint IDs
 
         --------------------------------------------------------------------------------------------------------------
         Note: PyBullet's quaternion information is always given as [x, y, z, w]
@@ -294,14 +327,13 @@ class PyBulletRobot(RobotBase):
         :return: no return value
         """
 
-        states = self.get_qdq_joints_fingers()
-        current_j_pos = states[0][:7]  # joint positions
-        current_j_vel = states[1][:7]  # joint velocities
-        self.current_j_vel = current_j_vel
-        self.current_j_pos = current_j_pos
+        self._joint_states_valid = False  # take a new snapshot of the joint states
+        states = self.get_joint_states()
+        self.current_j_pos = states[0][:7].copy()  # joint positions
+        self.current_j_vel = states[1][:7].copy()  # joint velocities
 
-        self.current_fing_pos = states[0][7:9]  # finger positions
-        self.current_fing_vel = states[1][7:9]  # finger velocities
+        self.current_fing_pos = states[0][7:9].copy()  # finger positions
+        self.current_fing_vel = states[1][7:9].copy()  # finger velocities
 
         cart_infos = self.get_x()
         self.current_c_pos = cart_infos[0]
@@ -320,8 +352,7 @@ class PyBulletRobot(RobotBase):
 
         # calculate width of the fingers:
         # I don't know if this is correct! Check later!
-        self.gripper_width = np.abs(self.pybullet.getJointState(bodyUniqueId=self.robot_id, jointIndex=10)[0] -
-                                    self.pybullet.getJointState(bodyUniqueId=self.robot_id, jointIndex=11)[0])
+        self.gripper_width = np.abs(self.current_fing_pos[0] - self.current_fing_pos[1])
         self.last_cmd = self.uff
 
     # self.des_joint_pos = np.zeros((self.num_DoF,)) * np.nan
@@ -358,19 +389,23 @@ class PyBulletRobot(RobotBase):
                 self.pybullet.setJointMotorControlArray(bodyUniqueId=self.robot_id,
                                                         jointIndices=self.jointIndices_with_fingers[:-2],
                                                         controlMode=self.pybullet.POSITION_CONTROL,
-                                                        targetPositions=target_position)
+                                                        targetPositions=target_position,
+                                                        physicsClientId=self.client_id)
                 finger_commands = self.fing_ctrl_step()
                 self.pybullet.setJointMotorControlArray(bodyUniqueId=self.robot_id,
                                                         jointIndices=[10, 11],
                                                         controlMode=self.pybullet.TORQUE_CONTROL,
-                                                        forces=finger_commands)
+                                                        forces=finger_commands,
+                                                        physicsClientId=self.client_id)
             else:
                 self.pybullet.setJointMotorControlArray(bodyUniqueId=self.robot_id,
                                                         jointIndices=self.jointIndices_with_fingers,
                                                         controlMode=self.pybullet.TORQUE_CONTROL,
-                                                        forces=self.uff.copy())
+                                                        forces=self.uff.copy(),
+                                                        physicsClientId=self.client_id)
 
-            self.pybullet.stepSimulation()  # execute simulation for one step (moves the robot)
+            self.pybullet.stepSimulation(physicsClientId=self.client_id)  # execute simulation for one step (moves the robot)
+            self._joint_states_valid = False
             self.num_calls += 1
             if self.logger.isLogging:
                 self.logger.logData()
@@ -407,8 +442,6 @@ class PyBulletRobot(RobotBase):
     # we need a use_fictive flag here to make sure that it is also possible to use the inverse Kinematics of pybullet
     # for moving the robot. -> if use_fictive = False the inv kinematics of pybullet will be used
     def gotoCartPositionAndQuat(self, desiredPos, desiredQuat, use_fictive=True, duration=4.0):
-        desired_cart_traj = None
-        desired_cart_vels = None
         init_j_pos, _, __ = self.get_qdq_J()
 
         if use_fictive:
@@ -429,24 +462,10 @@ class PyBulletRobot(RobotBase):
                     self.nextStep(des_joints)
                     self.des_joint_pos = des_joints
 
-        if desired_cart_traj is not None and not self.pos_ctrl:
-            if np.isnan(self.logger.des_c_pos_list[-1][0]):
-                self.logger.des_c_pos_list[-np.int(duration / self.dt):] = list(desired_cart_traj[:, :3])
-                self.logger.des_c_vel_list[-np.int(duration / self.dt):] = list(desired_cart_vels[:, :3])
-
-                self.logger.des_quat_list[-np.int(duration / self.dt):] = list(desired_cart_traj[:, 3::])
-                self.logger.des_quat_vel_list[-np.int(duration / self.dt):] = list(desired_cart_vels[:, 3::])
-            else:
-                self.logger.des_c_pos_list += list(desired_cart_traj[:, :3])
-                self.logger.des_c_vel_list += list(desired_cart_vels[:, :3])
-
-                self.logger.des_quat_list += list(desired_cart_traj[:, 3::])
-                self.logger.des_quat_vel_list += list(desired_cart_vels[:, 3::])
-
 
 class PyBulletRobot_Fictive(FictiveRobot):
 
-    def __init__(self, init_j_pos, pybullet, robotEndEffectorIndex, scene, ik_robot_id, config_path=None):
+    def __init__(self, init_j_pos, pybullet, robotEndEffectorIndex, scene, ik_robot_id=None, config_path=None):
         if config_path is None:
             move_dirs_up = 2
             config_path = sim_framework_path('./classic_framework/controllers/Config/PyBullet/FictiveRobot')
@@ -455,23 +474,33 @@ class PyBulletRobot_Fictive(FictiveRobot):
         self.scene = scene
         self.pybullet = pybullet
         self.robotEndEffectorIndex = robotEndEffectorIndex
+        if ik_robot_id is None:
+            ik_robot_id = self.scene.robot_ik_client_id
         self.ik_robot_id = ik_robot_id
         self.ik_client_id = self.scene.ik_client_id
+        self._ik_joints = list(init_j_pos)
         self.receiveState()
 
     def set_joints(self, new_joints):
-        self.scene.set_q(list(new_joints), robot_id=self.ik_robot_id, physicsClientId=self.ik_client_id)
+        # The IK robot may be shared with other scenes (see IKClientPool), so the joints are only set in the simulation
+        # right before they are used in getForwardKinematics, while holding the lock of the pool.
+        self._ik_joints = list(new_joints)
 
     def getForwardKinematics(self, q=None):
-        return self.pybullet.getLinkState(bodyUniqueId=self.ik_robot_id, linkIndex=self.robotEndEffectorIndex,
-                                          computeLinkVelocity=1, computeForwardKinematics=1,
-                                          physicsClientId=self.ik_client_id)
+        if q is None:
+            q = self._ik_joints
+        with self.scene.ik_pool.lock():
+            self.scene.set_q(list(q), robot_id=self.ik_robot_id, physicsClientId=self.ik_client_id)
+            return self.pybullet.getLinkState(bodyUniqueId=self.ik_robot_id, linkIndex=self.robotEndEffectorIndex,
+                                              computeLinkVelocity=1, computeForwardKinematics=1,
+                                              physicsClientId=self.ik_client_id)
 
     def getJacobian(self):
         q = self.current_j_pos
-        jac_t, jac_r = self.pybullet.calculateJacobian(self.ik_robot_id, self.robotEndEffectorIndex,
-                                                       [0., 0., 0.0], list(q) + [0.] * 2, [0.] * 9, [0.] * 9,
-                                                       physicsClientId=self.ik_client_id)
+        with self.scene.ik_pool.lock():
+            jac_t, jac_r = self.pybullet.calculateJacobian(self.ik_robot_id, self.robotEndEffectorIndex,
+                                                           [0., 0., 0.0], list(q) + [0.] * 2, [0.] * 9, [0.] * 9,
+                                                           physicsClientId=self.ik_client_id)
 
         J = np.concatenate((np.array(jac_t)[:, :7], np.array(jac_r)[:, :7]), axis=0)
         return J
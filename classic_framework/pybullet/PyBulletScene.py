@@ -1,15 +1,117 @@
 """
 This module contains the :class:`Scene` class which is used to setup a scene for a robot simulation using PyBullet.
 """
+import threading
+
 import numpy as np
 import pybullet as p
 from pybullet_utils.bullet_client import BulletClient
 
 from classic_framework import Scene
+from classic_framework.pybullet.PyBulletAssetRegistry import AssetRegistry
 from classic_framework.pybullet.PyBullet_Camera import InHandCamera, CageCamera
 from classic_framework.utils.sim_path import sim_framework_path
 
 
+class IKClientPool:
+    """
+    Non-graphical physics client for inverse kinematics, shared between all scenes of a process which use the same
+    pool. The client (with the plane and the table) is only connected when it is requested for the first time. Panda
+    robots are loaded once per urdf file and base pose and then reused by every scene with this robot. The joints of
+    such a shared robot have to be set (see :func:`PyBulletScene.set_q`) before each use.
+
+    Threading: the client and its robots are shared by all threads using the pool (e.g. the scenes of a
+    :class:`ScenePool`). Every sequence of calls to the client which depends on its state, e.g. setting the joints of
+    a robot and querying its link state afterwards, has to hold :func:`lock`:
+
+        with pool.lock():
+            scene.set_q(q, robot_id=robot_id, physicsClientId=pool.get_client_id())
+            link_state = p.getLinkState(robot_id, ..., physicsClientId=pool.get_client_id())
+
+    Otherwise another thread may set the joints of the shared robot in between. :class:`PyBulletRobot_Fictive` does
+    this for its queries.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.client = None
+        self.client_id = None
+        self.scene_id = None
+        self.table_id = None
+        self._robot_ids = {}
+
+    def lock(self):
+        """
+        Returns the (reentrant) lock which has to be held for all sequences of calls to the client, see the class
+        documentation.
+
+        :return: threading.RLock, to be used as context manager
+        """
+        return self._lock
+
+    def get_client_id(self):
+        """
+        Returns the id of the physics client, connecting it if necessary.
+
+        :return: id of the physics client
+        """
+        with self._lock:
+            if self.client is None:
+                self.client = BulletClient(connection_mode=p.DIRECT)
+                self.client_id = self.client._client
+
+                self.scene_id = p.loadURDF(sim_framework_path("./envs/plane/plane.urdf"),
+                                           physicsClientId=self.client_id)
+                table_start_orientation_quat = p.getQuaternionFromEuler([0.0, 0.0, 0.0])
+                self.table_id = p.loadURDF(sim_framework_path("./envs/table/table.urdf"),
+                                           [0.35, 0.0, 0.0],
+                                           table_start_orientation_quat,
+                                           flags=p.URDF_USE_SELF_COLLISION | p.URDF_USE_INERTIA_FROM_FILE,
+                                           physicsClientId=self.client_id)
+            return self.client_id
+
+    def get_robot_id(self, path_to_urdf, position, orientation):
+        """
+        Returns the id of a panda robot in the physics client, loading it if there is no robot with the same urdf file
+        and base pose yet.
+
+        :param path_to_urdf: the whole path of the location of the urdf file
+        :param position: cartesian world position of the robot
+        :param orientation: orientation of the robot as quaternion [x, y, z, w]
+        :return: id of the robot in the physics client
+        """
+        key = (path_to_urdf, tuple(position), tuple(orientation))
+        with self._lock:
+            if key not in self._robot_ids:
+                self._robot_ids[key] = p.loadURDF(path_to_urdf,
+                                                  list(position),
+                                                  list(orientation),
+                                                  useFixedBase=1,
+                                                  flags=p.URDF_USE_SELF_COLLISION,
+                                                  # | p.URDF_USE_SELF_COLLISION_INCLUDE_PARENT
+                                                  physicsClientId=self.get_client_id())
+            return self._robot_ids[key]
+
+    def disconnect(self):
+        """
+        Disconnects the physics client. It is connected again on the next request.
+
+        :return: no return value
+        """
+        with self._lock:
+            if self.client is not None:
+                p.disconnect(physicsClientId=self.client_id)
+            self.client = None
+            self.client_id = None
+            self.scene_id = None
+            self.table_id = None
+            self._robot_ids = {}
+
+
+# IK client pool which is used by all scenes if no other pool is given
+ik_client_pool = IKClientPool()
+
+
 class PyBulletScene(Scene):
     """
     This class allows to build a scene for the robot simulation. The standard scene is a model of the Panda robot on a
@@ -17,24 +119,33 @@ class PyBulletScene(Scene):
     The .urdf files which contain the scene assets (e.g. cubes etc.) are saved in the 'envs' folder of the project.
     """
 
-    def __init__(self, object_list=None, dt=0.001, render=True, realtime=False):
+    def __init__(self, object_list=None, dt=0.001, render=True, realtime=False, ik_pool=None, file_caching=True):
         super(PyBulletScene, self).__init__(object_list=object_list, dt=dt, render=render)
         """
         Initialization of the physics client and cameras (in-hand and cage cam). Calls :func:`setup_scene`.
 
         :param realtime:  Enable or disable real time simulation (using the real time clock, RTC) in the physics server.
+        :param ik_pool: :class:`IKClientPool` providing the physics client for inverse kinematics; if None, the pool
+                        shared by all scenes of the process is used
+        :param file_caching: Enable or disable Bullet's cache of loaded files. Disable it if asset files are modified
+                             while the program is running.
         """
+        if ik_pool is None:
+            ik_pool = ik_client_pool
+        self.ik_pool = ik_pool
         self.physics_client_id = None
-        self.ik_client_id = None
         self.robot_physics_client_id = None
-        self.robot_ik_client_id = None
+        self._robot_ik_args = None  # urdf file and base pose of the robot, loaded to the IK client on request
+        self.file_caching = file_caching
+        self.assets = None
+        self._layout_ids = {}
         self.setup_scene()
         self.realtime = realtime
         self.inhand_cam = InHandCamera()
         self.cage_cam = CageCamera()
         self.obj_name2id = {}
         if self.realtime:
-            p.setRealTimeSimulation(1)
+            p.setRealTimeSimulation(1, physicsClientId=self.physics_client_id)
 
     def setup_scene(self):
         """
@@ -52,9 +163,8 @@ class PyBulletScene(Scene):
             self.physics_client = BulletClient(p.DIRECT)  # o r p.DIRECT for non-graphical version
 
         self.physics_client_id = self.physics_client._client
-        self.ik_client = BulletClient(connection_mode=p.DIRECT)
-        self.ik_client_id = self.ik_client._client
-        p.setPhysicsEngineParameter(enableFileCaching=0)
+        p.setPhysicsEngineParameter(enableFileCaching=int(self.file_caching), physicsClientId=self.physics_client_id)
+        self.assets = AssetRegistry(self.physics_client_id)
         # --------------------------------------------------------------------------------------------------------------
         # # Load scene
         # --------------------------------------------------------------------------------------------------------------
@@ -73,7 +183,6 @@ class PyBulletScene(Scene):
 
         self.scene_id = p.loadURDF(sim_framework_path("./envs/plane/plane.urdf"),
                                    physicsClientId=self.physics_client_id)
-        self.scene_id_ik = p.loadURDF(sim_framework_path("./envs/plane/plane.urdf"), physicsClientId=self.ik_client_id)
 
         # load table
         table_urdf = sim_framework_path("./envs/table/table.urdf")
@@ -86,13 +195,38 @@ class PyBulletScene(Scene):
                                    flags=p.URDF_USE_SELF_COLLISION | p.URDF_USE_INERTIA_FROM_FILE,
                                    physicsClientId=self.physics_client_id)
 
-        self.table_id_ik = p.loadURDF(table_urdf,
-                                      table_start_position,
-                                      table_start_orientation_quat,
-                                      flags=p.URDF_USE_SELF_COLLISION | p.URDF_USE_INERTIA_FROM_FILE,
-                                      physicsClientId=self.ik_client_id)
+        p.setGravity(0, 0, -9.81, physicsClientId=self.physics_client_id)
+
+    def close(self):
+        """
+        Disconnects the physics client of the scene. The shared IK client stays connected.
+
+        :return: no return value
+        """
+        if self.physics_client_id is not None:
+            p.disconnect(physicsClientId=self.physics_client_id)
+            self.physics_client_id = None
+
+    @property
+    def ik_client(self):
+        """
+        Physics client for inverse kinematics (from :attr:`ik_pool`), connected on first access.
+        """
+        self.ik_pool.get_client_id()
+        return self.ik_pool.client
+
+    @property
+    def ik_client_id(self):
+        return self.ik_pool.get_client_id()
 
-        p.setGravity(0, 0, -9.81)
+    @property
+    def robot_ik_client_id(self):
+        """
+        Id of the robot in the IK client, which is loaded on first access.
+        """
+        if self._robot_ik_args is None:
+            return None
+        return self.ik_pool.get_robot_id(*self._robot_ik_args)
 
     def load_panda_to_scene(self, physics_robot=True, orientation=None, position=None, id_name=None, path_to_urdf=None,
                             init_q=None):
@@ -106,7 +240,8 @@ class PyBulletScene(Scene):
         :param position: cartesian world position to place the robot
         :param id_name: string valued name of the robot. This name can then be called as self.'name'_id to get the
                         id number of the object
-        :return: returns the id of the new panda robot
+        :return: returns the id of the new panda robot, the id of the robot in the IK client (None, it is loaded on
+                 request, see :attr:`robot_ik_client_id`) and the index of the end effector link
         """
         if position is None:
             position = [0.0, 0.0, 0.88]
@@ -126,28 +261,21 @@ class PyBulletScene(Scene):
         position = list(position)
 
         try:
-            id = p.loadURDF(obj_urdf,
-                            position,
-                            orientation,
-                            useFixedBase=1,
-                            # | p.URDF_USE_SELF_COLLISION_INCLUDE_PARENT
-                            flags=p.URDF_USE_SELF_COLLISION | p.URDF_USE_INERTIA_FROM_FILE,
-                            # flags=p.URDF_USE_SELF_COLLISION | p.URDF_USE_SELF_COLLISION_INCLUDE_PARENT,
-                            physicsClientId=self.physics_client_id)
-
-            ik_id = p.loadURDF(obj_urdf,
-                               position,
-                               orientation,
-                               useFixedBase=1,
-                               flags=p.URDF_USE_SELF_COLLISION,  # | p.URDF_USE_SELF_COLLISION_INCLUDE_PARENT
-                               physicsClientId=self.ik_client_id)
+            id = self.assets.load_urdf(obj_urdf,
+                                       position,
+                                       orientation,
+                                       useFixedBase=1,
+                                       # | p.URDF_USE_SELF_COLLISION_INCLUDE_PARENT
+                                       flags=p.URDF_USE_SELF_COLLISION | p.URDF_USE_INERTIA_FROM_FILE,
+                                       # flags=p.URDF_USE_SELF_COLLISION | p.URDF_USE_SELF_COLLISION_INCLUDE_PARENT,
+                                       )
 
             if id_name is not None:
                 setattr(self, id_name + '_id', id)
                 self.obj_name2id[id_name + '_id'] = id
             else:
                 self.robot_physics_client_id = id
-                self.robot_ik_client_id = ik_id
+                self._robot_ik_args = (obj_urdf, tuple(position), tuple(orientation))
 
         except Exception:
             print()
@@ -168,12 +296,13 @@ class PyBulletScene(Scene):
         # robotEndEffectorIndex = 8
         # robotEndEffectorIndex = 9
         robotEndEffectorIndex = 12
-        return id, ik_id, robotEndEffectorIndex
+        return id, None, robotEndEffectorIndex
 
     def load_object_to_scene(self, path_to_urdf, orientation, position, id_name, fixed=0, inertia_from_file=False):
         """
         This function loads an object to the simulation environment. If loading the object fails, the program is stopped
-        and an appropriate get_error message is returned to user.
+        and an appropriate get_error message is returned to user. Objects of the same file which were removed with
+        :func:`remove_object_from_scene` are reused instead of loading the file again.
 
         :param path_to_urdf: the whole path of the location of the urdf file to be load as string
         :param orientation: orientation of the object. Can be either euler angles, or quaternions. NOTE: quaternions
@@ -194,18 +323,17 @@ class PyBulletScene(Scene):
 
         try:
             if inertia_from_file == True:
-                id = p.loadURDF(obj_urdf,
-                                position,
-                                orientation,
-                                fixed,
-                                flags=p.URDF_USE_SELF_COLLISION | p.URDF_USE_INERTIA_FROM_FILE,
-                                physicsClientId=self.physics_client_id)
+                id = self.assets.load_urdf(obj_urdf,
+                                           position,
+                                           orientation,
+                                           fixed,
+                                           flags=p.URDF_USE_SELF_COLLISION | p.URDF_USE_INERTIA_FROM_FILE)
             else:
-                id = p.loadURDF(obj_urdf,
-                                position,
-                                orientation,
-                                fixed,
-                                flags=p.URDF_USE_SELF_COLLISION, physicsClientId=self.physics_client_id)
+                id = self.assets.load_urdf(obj_urdf,
+                                           position,
+                                           orientation,
+                                           fixed,
+                                           flags=p.URDF_USE_SELF_COLLISION)
 
             setattr(self, id_name + '_id', id)
         except Exception:
@@ -215,6 +343,47 @@ class PyBulletScene(Scene):
                              obj_urdf)
         return id
 
+    def remove_object_from_scene(self, id_name):
+        """
+        Removes an object or a GRASPA layout loaded with :func:`load_object_to_scene` /
+        :func:`load_graspa_layout_to_scene`. The bodies are kept in the asset registry and reused by the next load of
+        the same file.
+
+        :param id_name: name of the object or layout
+        :return: no return value
+        """
+        if id_name in self._layout_ids:
+            body_ids = self._layout_ids.pop(id_name)
+            for i in range(len(body_ids)):
+                delattr(self, id_name + '_' + str(i) + '_id')
+        else:
+            body_ids = getattr(self, id_name + '_id')
+            delattr(self, id_name + '_id')
+            self.obj_name2id.pop(id_name + '_id', None)
+        self.assets.release(body_ids)
+
+    def reset_scene(self, object_poses, init_q=None):
+        """
+        Moves objects of the scene to new poses and sets their velocities to zero, which is much faster than building
+        the scene again. The robot is reset to init_q, if given (call receiveState of the robot afterwards).
+
+        :param object_poses: dict mapping the names of the objects to tuples (position, orientation); the orientation
+                             can be either euler angles or quaternions [x, y, z, w]
+        :param init_q: joint positions (7) of the robot or None to keep the robot as it is
+        :return: no return value
+        """
+        for id_name, (position, orientation) in object_poses.items():
+            obj_id = getattr(self, id_name + '_id')
+            orientation = list(orientation)
+            if len(orientation) == 3:
+                orientation = p.getQuaternionFromEuler(orientation)
+            p.resetBasePositionAndOrientation(obj_id, list(position), orientation,
+                                              physicsClientId=self.physics_client_id)
+            p.resetBaseVelocity(obj_id, [0, 0, 0], [0, 0, 0], physicsClientId=self.physics_client_id)
+
+        if init_q is not None:
+            self.set_q(init_q)
+
     def get_id_from_name(self, obj_name):
         """
         Returns the object id from the object name specified when creating the object.
@@ -242,7 +411,7 @@ class PyBulletScene(Scene):
 
         layout_sdf = path_to_sdf
         try:
-            objects_ids = p.loadSDF(layout_sdf)
+            objects_ids = list(self.assets.load_sdf(layout_sdf))
 
         except Exception:
             print()
@@ -252,6 +421,7 @@ class PyBulletScene(Scene):
 
         for i, id in enumerate(objects_ids):
             setattr(self, id_name + '_' + str(i) + '_id', id)
+        self._layout_ids[id_name] = tuple(objects_ids)
 
         orientation = list(orientation)
         if len(orientation) == 3:
@@ -259,9 +429,10 @@ class PyBulletScene(Scene):
         position = list(position)
 
         for obj in objects_ids:
-            pose_obj = p.getBasePositionAndOrientation(obj)
+            pose_obj = p.getBasePositionAndOrientation(obj, physicsClientId=self.physics_client_id)
             new_pose_obj = p.multiplyTransforms(position, orientation, pose_obj[0], pose_obj[1])
-            p.resetBasePositionAndOrientation(obj, new_pose_obj[0], new_pose_obj[1])
+            p.resetBasePositionAndOrientation(obj, new_pose_obj[0], new_pose_obj[1],
+                                              physicsClientId=self.physics_client_id)
 
         matrix = p.getMatrixFromQuaternion(orientation)
         dcm = np.array([matrix[0:3], matrix[3:6], matrix[6:9]])
@@ -269,9 +440,9 @@ class PyBulletScene(Scene):
         pay = np.add(position, dcm.dot([0, 0.1, 0]))
         paz = np.add(position, dcm.dot([0, 0, 0.1]))
 
-        p.addUserDebugLine(position, pax.tolist(), [1, 0, 0])
-        p.addUserDebugLine(position, pay.tolist(), [0, 1, 0])
-        p.addUserDebugLine(position, paz.tolist(), [0, 0, 1])
+        p.addUserDebugLine(position, pax.tolist(), [1, 0, 0], physicsClientId=self.physics_client_id)
+        p.addUserDebugLine(position, pay.tolist(), [0, 1, 0], physicsClientId=self.physics_client_id)
+        p.addUserDebugLine(position, paz.tolist(), [0, 0, 1], physicsClientId=self.physics_client_id)
 
         return objects_ids
 
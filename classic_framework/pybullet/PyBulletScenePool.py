@@ -0,0 +1,72 @@
+"""
+This module contains the :class:`ScenePool` class which runs several independent PyBullet scenes in one process.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pybullet as p
+
+from classic_framework.pybullet.PyBulletRobot import PyBulletRobot
+from classic_framework.pybullet.PyBulletScene import PyBulletScene
+
+
+class ScenePool:
+    """
+    Creates non-graphical (p.DIRECT) scenes with a panda robot each, e.g. for parallel data collection. Every scene and
+    robot only uses its own physics client, so the scenes are simulated in parallel by the threads of a pool (PyBullet
+    releases the GIL while stepping the simulation).
+    """
+
+    def __init__(self, num_scenes, object_lists=None, dt=0.001, max_workers=None, **robot_kwargs):
+        """
+        :param num_scenes: number of scenes
+        :param object_lists: list with the object_list of every scene, None for scenes without objects
+        :param dt: time step of the simulations
+        :param max_workers: number of threads, see concurrent.futures.ThreadPoolExecutor
+        :param robot_kwargs: keyword arguments for the PyBulletRobots, e.g. gravity_comp or pos_ctrl
+        """
+        if object_lists is None:
+            object_lists = [None] * num_scenes
+        if len(object_lists) != num_scenes:
+            raise ValueError("Error, got " + str(len(object_lists)) + " object lists for " + str(num_scenes) +
+                             " scenes.")
+
+        self.scenes = [PyBulletScene(object_list=object_list, dt=dt, render=False) for object_list in object_lists]
+        self.robots = [PyBulletRobot(p, scene, **robot_kwargs) for scene in self.scenes]
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def __len__(self):
+        return len(self.scenes)
+
+    def map(self, fn, *args):
+        """
+        Calls fn(robot, *args_i) for the robot of every scene in the thread pool and waits for all calls.
+
+        :param fn: function which gets the robot of a scene and the scene specific arguments
+        :param args: lists with one argument per scene
+        :return: list with the return values of fn, in the order of the scenes
+        """
+        futures = [self.executor.submit(fn, robot, *[arg[i] for arg in args]) for i, robot in enumerate(self.robots)]
+        return [future.result() for future in futures]
+
+    def step(self, num_steps=1):
+        """
+        Simulates all scenes for num_steps time steps with the current commands of their robots.
+
+        :param num_steps: number of time steps
+        :return: no return value
+        """
+        def steps(robot):
+            for _ in range(num_steps):
+                robot.nextStep()
+
+        self.map(steps)
+
+    def close(self):
+        """
+        Stops the threads and disconnects the physics clients of all scenes.
+
+        :return: no return value
+        """
+        self.executor.shutdown()
+        for scene in self.scenes:
+            scene.close()
@@ -111,10 +111,10 @@ class Camera:
         """
         self.plt.cla()
 
-    def remove_created_bodies(self, list_ids, n_bodies):
+    def remove_created_bodies(self, list_ids, n_bodies, client_id=0):
         for i in range(n_bodies):
-            p.removeBody(list_ids[i])
-        p.configureDebugVisualizer(p.COV_ENABLE_RENDERING, 1)
+            p.removeBody(list_ids[i], physicsClientId=client_id)
+        p.configureDebugVisualizer(p.COV_ENABLE_RENDERING, 1, physicsClientId=client_id)
 
     def get_image(self, cam_id, client_id, with_noise=False, shadow=True):
         """
@@ -1,3 +1,4 @@
 from .PyBulletRobot import *
 from .PyBullet_Camera import *
 from .PyBulletScene import *
+from .PyBulletScenePool import *
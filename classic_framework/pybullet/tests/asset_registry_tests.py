@@ -0,0 +1,62 @@
+import numpy as np
+import pybullet as p
+from unittest import TestCase
+
+from classic_framework.pybullet.PyBulletAssetRegistry import AssetRegistry
+from classic_framework.utils.sim_path import sim_framework_path
+
+PANDA_URDF = sim_framework_path('envs', 'frankaemika', 'robots', 'panda_arm_hand_without_cam.urdf')
+
+
+class TestAssetRegistry(TestCase):
+    def setUp(self) -> None:
+        self.client_id = p.connect(p.DIRECT)
+        self.registry = AssetRegistry(self.client_id)
+
+    def tearDown(self) -> None:
+        p.disconnect(physicsClientId=self.client_id)
+
+    def load(self, position):
+        return self.registry.load_urdf(PANDA_URDF, position, [0, 0, 0, 1], flags=p.URDF_USE_INERTIA_FROM_FILE)
+
+    def dynamics(self, body_id):
+        links = range(-1, p.getNumJoints(body_id, physicsClientId=self.client_id))
+        return [p.getDynamicsInfo(body_id, link, physicsClientId=self.client_id)[:3:2] for link in links]
+
+    def jointStates(self, body_id):
+        joints = range(p.getNumJoints(body_id, physicsClientId=self.client_id))
+        return np.array([p.getJointState(body_id, j, physicsClientId=self.client_id)[:2] for j in joints])
+
+    def testPark(self):
+        body_id = self.load([0.5, 0.0, 0.0])
+        self.registry.release(body_id)
+
+        self.assertTrue(self.registry.is_parked(body_id))
+        position, _ = p.getBasePositionAndOrientation(body_id, physicsClientId=self.client_id)
+        np.testing.assert_allclose(position, self.registry.parking_position)
+        for mass, _ in self.dynamics(body_id):
+            self.assertEqual(mass, 0)
+        with self.assertRaises(ValueError):
+            self.registry.release(body_id)
+
+    def testReuse(self):
+        body_id = self.load([0.5, 0.0, 0.0])
+        dynamics = self.dynamics(body_id)
+        joint_states = self.jointStates(body_id)
+        for j in range(p.getNumJoints(body_id, physicsClientId=self.client_id)):
+            p.resetJointState(body_id, j, 0.3, 0.1, physicsClientId=self.client_id)
+        self.registry.release(body_id)
+
+        self.assertEqual(self.load([0.1, 0.2, 0.3]), body_id)
+        self.assertFalse(self.registry.is_parked(body_id))
+        position, orientation = p.getBasePositionAndOrientation(body_id, physicsClientId=self.client_id)
+        np.testing.assert_allclose(position, [0.1, 0.2, 0.3])
+        np.testing.assert_allclose(orientation, [0, 0, 0, 1])
+        for (mass, inertia), (exp_mass, exp_inertia) in zip(self.dynamics(body_id), dynamics):
+            self.assertAlmostEqual(mass, exp_mass)
+            np.testing.assert_allclose(inertia, exp_inertia)
+        np.testing.assert_array_equal(self.jointStates(body_id), joint_states)
+
+    def testLoadsNewBodyWithoutParkedOne(self):
+        body_id = self.load([0.5, 0.0, 0.0])
+        self.assertNotEqual(self.load([0.5, 0.0, 0.0]), body_id)
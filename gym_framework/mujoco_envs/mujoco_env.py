@@ -5,8 +5,9 @@ import numpy as np
 from gym.utils import seeding
 from mujoco_py import MjSimState, MjViewer
 
-from classic_framework.mujoco.mujoco_utils import MujocoSceneParser, MujocoLoadable
+from classic_framework.mujoco.mujoco_utils import MujocoSceneParser
 from classic_framework.mujoco.mujoco_utils.mujoco_scene_object import MujocoWorkspace
+from classic_framework.mujoco.mujoco_utils.mujoco_sim_state import MujocoStateLayout
 from gym_framework.panda_ctrl.panda_mujoco_base_ctrl import PandaBase
 
 
@@ -39,15 +40,11 @@ class MujocoEnv(gym.Env, ABC):
         self.xml_parser = MujocoSceneParser(panda_xml_path=xml_path)
         self.xml_parser.set_dt(dt)
 
-        obj_list.append(MujocoWorkspace(workspace_size))
-
         self.xml_parser.set_control(control=agent, set_gripper=False)
         self.xml_parser.set_damping(agent.joint_damping)
 
         # adding objects to the scene
-        for obj in obj_list:
-            if isinstance(obj, MujocoLoadable):
-                self.xml_parser.load_mj_loadable(obj)
+        self.xml_parser.add_many(list(obj_list) + [MujocoWorkspace(workspace_size)])
 
         self._tcp_id = 'tcp'
         self.sim, _ = self.xml_parser.create_sim(nsubsteps)
@@ -66,6 +63,8 @@ class MujocoEnv(gym.Env, ABC):
 
         self.random_env = random_env
 
+        self._state_layout = None
+        self._init_state = None
         self.reset()
 
     def step(self, action):
@@ -95,15 +94,23 @@ class MujocoEnv(gym.Env, ABC):
     def reset(self):
         """Resets the environment (including the agent) to the initial conditions.
         """
-        self.sim.reset()
-        # Set initial position and velocity
-        self.qpos = self.sim.data.qpos.copy()
-        self.qpos[:self.robot_init_qpos.shape[0]] = self.robot_init_qpos
+        if self._init_state is None:
+            self.sim.reset()
+            # Set initial position and velocity
+            qpos = self.sim.data.qpos.copy()
+            qpos[:self.robot_init_qpos.shape[0]] = self.robot_init_qpos
+            qvel = np.zeros(self.sim.data.qvel.shape)
+            mjSimState = MjSimState(time=0.0, qpos=qpos, qvel=qvel, act=None, udd_state={})
+            self.sim.set_state(mjSimState)
+            self._state_layout = MujocoStateLayout(self.sim.model, extra_size=2)
+            self._init_state = self._state_layout.snapshot(self.sim)
+        else:
+            self._state_layout.restore(self.sim, self._init_state, forward=False)
+
+        # randomization writes directly into the positions of the simulation
+        self.qpos = self.sim.data.qpos
         if self.random_env:
             self.callback_randomize_env()
-        qvel = np.zeros(self.sim.data.qvel.shape)
-        mjSimState = MjSimState(time=0.0, qpos=self.qpos, qvel=qvel, act=None, udd_state={})
-        self.sim.set_state(mjSimState)
         self.sim.forward()
 
         self.terminated = False
@@ -111,6 +118,34 @@ class MujocoEnv(gym.Env, ABC):
 
         return self.get_observations()
 
+    def snapshot(self, out=None):
+        """Captures the state of the simulation and the episode into a flat buffer, e.g. for trying an action and
+        rolling it back afterwards. Randomized model parameters (e.g. the goal position) are not part of the snapshot.
+
+        Args:
+            out: buffer returned by a previous call which is overwritten. If None, a new buffer is allocated.
+
+        Returns:
+            numpy array
+        """
+        out = self._state_layout.snapshot(self.sim, out)
+        extra = self._state_layout.extra(out)
+        extra[0] = self.env_step_counter
+        extra[1] = self.terminated
+        return out
+
+    def restore(self, state):
+        """Restores a snapshot created by :func:`snapshot`.
+
+        Returns:
+            observation of the restored state
+        """
+        self._state_layout.restore(self.sim, state)
+        extra = self._state_layout.extra(state)
+        self.env_step_counter = int(extra[0])
+        self.terminated = bool(extra[1])
+        return self.get_observations()
+
     def seed(self, seed=None):
         self.np_random, seed = seeding.np_random(seed)
         return [seed]
@@ -0,0 +1,83 @@
+import numpy as np
+from unittest import TestCase
+from gym_framework.mujoco_envs.pick_and_place_env.pick_and_place_env import PickAndPlaceMocapCtrl
+from gym_framework.mujoco_envs.subproc_mujoco_env import SubprocVectorMujocoEnv
+from gym_framework.mujoco_envs.vector_mujoco_env import VectorMujocoEnv
+
+
+class TestVectorPickAndPlaceMocapCtrl(TestCase):
+    def setUp(self) -> None:
+        self.num_envs = 4
+        self.envs = VectorMujocoEnv(PickAndPlaceMocapCtrl, num_envs=self.num_envs, render=0, max_steps=100,
+                                    nsubsteps=3, random_env=True)
+
+    def sampleActions(self):
+        return np.stack([self.envs.action_space.sample() for _ in range(self.num_envs)])
+
+    def testRndActions(self):
+        obs = self.envs.reset()
+        self.assertEqual(obs.shape, (self.num_envs, self.envs.observation_dim))
+        for i in range(1000):
+            obs, rewards, dones, infos = self.envs.step(self.sampleActions())
+            self.assertEqual(obs.shape, (self.num_envs, self.envs.observation_dim))
+            self.assertEqual(rewards.shape, (self.num_envs,))
+            self.assertEqual(dones.shape, (self.num_envs,))
+            self.assertEqual(len(infos), self.num_envs)
+
+    def testIndependentSimulations(self):
+        self.envs.reset()
+        actions = np.zeros((self.num_envs, self.envs.action_dim))
+        actions[0, 2] = 1  # only the first robot moves upwards
+        for _ in range(50):
+            obs, _, _, _ = self.envs.step(actions)
+        tcp_z = [sim.data.get_body_xpos('tcp')[2] for sim in self.envs.sims]
+        self.assertTrue(tcp_z[0] > max(tcp_z[1:]))
+        self.assertTrue(np.allclose(tcp_z[1:], tcp_z[1]))
+
+    def testAutoReset(self):
+        self.envs.reset()
+        for i in range(100):
+            obs, _, dones, infos = self.envs.step(self.sampleActions())
+        self.assertTrue(dones.all())
+        for info in infos:
+            self.assertTrue('terminal_observation' in info)
+        self.assertTrue((self.envs._step_counters == 0).all())
+
+    def testPartialReset(self):
+        self.envs.reset()
+        for _ in range(10):
+            self.envs.step(self.sampleActions())
+        mask = np.zeros(self.num_envs, dtype=bool)
+        mask[1] = True
+        self.envs.reset(mask)
+        self.assertEqual(self.envs._step_counters[1], 0)
+        self.assertTrue((self.envs._step_counters[mask == 0] == 10).all())
+
+
+class TestSubprocVectorPickAndPlaceMocapCtrl(TestCase):
+    def setUp(self) -> None:
+        self.num_envs = 4
+        self.envs = SubprocVectorMujocoEnv(PickAndPlaceMocapCtrl, num_envs=self.num_envs, render=0, max_steps=100,
+                                           nsubsteps=3, random_env=True)
+
+    def tearDown(self) -> None:
+        self.envs.close()
+
+    def sampleActions(self):
+        return np.stack([self.envs.action_space.sample() for _ in range(self.num_envs)])
+
+    def testRndActions(self):
+        obs = self.envs.reset()
+        self.assertEqual(obs.shape, (self.num_envs, self.envs.observation_dim))
+        for i in range(1000):
+            obs, rewards, dones, infos = self.envs.step(self.sampleActions())
+            self.assertEqual(obs.shape, (self.num_envs, self.envs.observation_dim))
+            self.assertEqual(len(infos), self.num_envs)
+
+    def testAutoReset(self):
+        self.envs.reset()
+        for i in range(100):
+            obs, _, dones, infos = self.envs.step(self.sampleActions())
+        self.assertTrue(dones.all())
+        for info in infos:
+            self.assertEqual(info['terminal_observation'].shape, (self.envs.observation_dim,))
@@ -0,0 +1,208 @@
+import multiprocessing as mp
+from multiprocessing import shared_memory  # requires python >= 3.8
+
+import numpy as np
+
+from gym_framework.mujoco_envs.mujoco_env import MujocoEnv
+
+
+def _attach(name, shape, dtype):
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _worker(remote, parent_remote, index, env_cls, env_kwargs, auto_reset):
+    """Owns one environment. Actions are read from and results are written to the shared memory blocks of the
+    parent, the pipe only transports the commands and the (usually empty) info dicts.
+    """
+    parent_remote.close()
+    env = env_cls(**env_kwargs)
+    remote.send((env.observation_dim, env.action_dim, env.observation_space, env.action_space))
+
+    blocks = []
+    buffers = {}
+    try:
+        while True:
+            cmd, data = remote.recv()
+            if cmd == 'attach':
+                for key, (name, shape, dtype) in data.items():
+                    shm, buffers[key] = _attach(name, shape, dtype)
+                    blocks.append(shm)
+                remote.send(None)
+            elif cmd == 'step':
+                obs, reward, done, info = env.step(buffers['actions'][index].copy())
+                if done and auto_reset:
+                    buffers['terminal_observations'][index] = obs
+                    obs = env.reset()
+                buffers['observations'][index] = obs
+                buffers['rewards'][index] = reward
+                buffers['dones'][index] = done
+                remote.send(info)
+            elif cmd == 'reset':
+                buffers['observations'][index] = env.reset()
+                remote.send(None)
+            elif cmd == 'seed':
+                remote.send(env.seed(data))
+            elif cmd == 'close':
+                break
+            else:
+                raise ValueError("Error, unknown command " + str(cmd))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # the arrays have to be released before the shared memory can be closed
+        buffers.clear()
+        for shm in blocks:
+            shm.close()
+        remote.close()
+
+
+class SubprocVectorMujocoEnv:
+    """Runs N copies of a :class:`MujocoEnv` task in separate worker processes.
+
+    Each worker owns its own environment instance. Observations, rewards, dones and actions are exchanged through
+    :mod:`multiprocessing.shared_memory` blocks owned by this object, so per step only a short command and the info
+    dict of each environment are sent through the pipes. Requires python >= 3.8.
+
+    Example:
+        envs = SubprocVectorMujocoEnv(PickAndPlaceMocapCtrl, num_envs=32, render=False, nsubsteps=3)
+        obs = envs.reset()                                       # (32, obs_dim)
+        obs, rewards, dones, infos = envs.step(actions)          # actions: (32, action_dim)
+        envs.close()
+    """
+
+    def __init__(self, env_cls, num_envs, auto_reset=True, start_method='spawn', **env_kwargs):
+        """
+        Args:
+            env_cls:
+                Subclass of :class:`MujocoEnv`, e.g. PickAndPlaceMocapCtrl or ReachEnvMocapCtrl. Has to be importable
+                by the workers.
+            num_envs:
+                Number of worker processes
+            auto_reset:
+                If True, finished sub-environments are reset by their worker. The last observation of the finished
+                episode is then returned in the info dict under the key 'terminal_observation'.
+            start_method:
+                Start method of the worker processes, see :func:`multiprocessing.get_context`. Defaults to 'spawn'
+                since forking a process which already holds an OpenGL context is not safe.
+            **env_kwargs:
+                Keyword arguments passed to the constructor of env_cls in every worker.
+        """
+        assert num_envs >= 1, "Error, at least one environment is required."
+        assert issubclass(env_cls, MujocoEnv), "Error, env_cls has to be a subclass of MujocoEnv."
+        self.num_envs = num_envs
+        self.auto_reset = auto_reset
+        self.closed = False
+
+        ctx = mp.get_context(start_method)
+        self.remotes, self.processes = [], []
+        specs = []
+        for i in range(num_envs):
+            remote, work_remote = ctx.Pipe()
+            process = ctx.Process(target=_worker, args=(work_remote, remote, i, env_cls, env_kwargs, auto_reset),
+                                  daemon=True)
+            process.start()
+            work_remote.close()
+            self.remotes.append(remote)
+            self.processes.append(process)
+            specs.append(remote.recv())
+
+        obs_dim, action_dim, self.observation_space, self.action_space = specs[0]
+        for spec in specs[1:]:
+            assert spec[:2] == (obs_dim, action_dim), "Error, all environments need the same observation and " \
+                                                      "action dimensions."
+
+        layout = {'observations': ((num_envs, obs_dim), np.float64),
+                  'terminal_observations': ((num_envs, obs_dim), np.float64),
+                  'rewards': ((num_envs,), np.float64),
+                  'dones': ((num_envs,), np.bool_),
+                  'actions': ((num_envs, action_dim), np.float64)}
+        self._blocks = {}
+        self._buffers = {}
+        names = {}
+        for key, (shape, dtype) in layout.items():
+            nbytes = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+            shm = shared_memory.SharedMemory(create=True, size=nbytes)
+            self._blocks[key] = shm
+            self._buffers[key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+            self._buffers[key][:] = 0
+            names[key] = (shm.name, shape, dtype)
+
+        for remote in self.remotes:
+            remote.send(('attach', names))
+        for remote in self.remotes:
+            remote.recv()
+
+    def step(self, actions):
+        """Steps all sub-environments with one action each.
+
+        Args:
+            actions: numpy array (num_envs, action_dim)
+
+        Returns:
+            observations: numpy array (num_envs, obs_dim)
+            rewards: numpy array (num_envs,)
+            dones: boolean numpy array (num_envs,)
+            infos: list with one dict per sub-environment
+        """
+        self._buffers['actions'][:] = actions
+        for remote in self.remotes:
+            remote.send(('step', None))
+        infos = [remote.recv() for remote in self.remotes]
+
+        dones = self._buffers['dones'].copy()
+        if self.auto_reset:
+            for i in np.flatnonzero(dones):
+                infos[i] = dict(infos[i], terminal_observation=self._buffers['terminal_observations'][i].copy())
+        return self._buffers['observations'].copy(), self._buffers['rewards'].copy(), dones, infos
+
+    def reset(self, mask=None):
+        """Resets the sub-environments selected by mask.
+
+        Args:
+            mask: boolean numpy array (num_envs,). If None, all sub-environments are reset.
+
+        Returns:
+            observations of all sub-environments, numpy array (num_envs, obs_dim)
+        """
+        if mask is None:
+            mask = np.ones(self.num_envs, dtype=bool)
+        mask = np.asarray(mask, dtype=bool)
+        assert mask.shape == (self.num_envs,), "Error, mask has to contain one entry per environment."
+
+        remotes = [self.remotes[i] for i in np.flatnonzero(mask)]
+        for remote in remotes:
+            remote.send(('reset', None))
+        for remote in remotes:
+            remote.recv()
+        return self._buffers['observations'].copy()
+
+    def seed(self, seed=None):
+        for i, remote in enumerate(self.remotes):
+            remote.send(('seed', None if seed is None else seed + i))
+        return [remote.recv() for remote in self.remotes]
+
+    def close(self):
+        if self.closed:
+            return
+        for remote in self.remotes:
+            remote.send(('close', None))
+        for process in self.processes:
+            process.join()
+        self._buffers.clear()
+        for shm in self._blocks.values():
+            shm.close()
+            shm.unlink()
+        self.closed = True
+
+    def __del__(self):
+        if not getattr(self, 'closed', True):
+            self.close()
+
+    @property
+    def observation_dim(self):
+        return self._buffers['observations'].shape[1]
+
+    @property
+    def action_dim(self):
+        return self._buffers['actions'].shape[1]
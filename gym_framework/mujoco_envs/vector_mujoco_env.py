@@ -0,0 +1,156 @@
+import numpy as np
+from mujoco_py import MjSim
+
+from gym_framework.mujoco_envs.mujoco_env import MujocoEnv
+
+
+class VectorMujocoEnv:
+    """Runs N independent copies of a :class:`MujocoEnv` task in lock-step.
+
+    Only one environment object (and therefore one agent and one scene parser) is constructed. Its compiled model is
+    shared by ``num_envs`` :class:`MjSim` instances and the environment is pointed to the respective simulation
+    before it is stepped. Everything that differs between the copies, i.e. the episode bookkeeping of the environment
+    and the model body positions which are randomized on reset (e.g. the goal of the pick and place task), is stored
+    per copy and swapped in together with the simulation.
+
+    Example:
+        envs = VectorMujocoEnv(PickAndPlaceMocapCtrl, num_envs=8, render=False, nsubsteps=12)
+        obs = envs.reset()                                       # (8, obs_dim)
+        obs, rewards, dones, infos = envs.step(actions)          # actions: (8, action_dim)
+    """
+
+    def __init__(self, env_cls, num_envs, auto_reset=True, **env_kwargs):
+        """
+        Args:
+            env_cls:
+                Subclass of :class:`MujocoEnv`, e.g. PickAndPlaceMocapCtrl or ReachEnvMocapCtrl
+            num_envs:
+                Number of simulations which are stepped in parallel
+            auto_reset:
+                If True, finished sub-environments are reset within :func:`step`. The last observation of the finished
+                episode is then returned in the info dict under the key 'terminal_observation'.
+            **env_kwargs:
+                Keyword arguments passed to the constructor of env_cls. Only the first simulation is rendered.
+        """
+        assert num_envs >= 1, "Error, at least one environment is required."
+        self.env = env_cls(**env_kwargs)
+        assert isinstance(self.env, MujocoEnv), "Error, env_cls has to be a subclass of MujocoEnv."
+
+        self.num_envs = num_envs
+        self.auto_reset = auto_reset
+
+        model = self.env.sim.model
+        self.sims = [self.env.sim] + [MjSim(model=model, nsubsteps=self.env.sim.nsubsteps)
+                                      for _ in range(num_envs - 1)]
+
+        # per environment state which is swapped in before stepping the respective simulation
+        self._body_pos = np.repeat(model.body_pos[np.newaxis].copy(), num_envs, axis=0)
+        self._step_counters = np.zeros(num_envs, dtype=np.int64)
+        self._terminated = np.zeros(num_envs, dtype=bool)
+        self._episodes = np.zeros(num_envs, dtype=np.int64)
+
+        self._observations = np.zeros((num_envs, self.env.observation_dim))
+        self._rewards = np.zeros(num_envs)
+        self._dones = np.zeros(num_envs, dtype=bool)
+
+        # the first environment has already been set up and reset by its constructor
+        self._observations[0] = self.env.get_observations()
+        self._save(0)
+        for i in range(1, num_envs):
+            self._load(i)
+            self.env.agent.env_setup(self.sims[i], None)
+            self._observations[i] = self.env.reset()
+            self._save(i)
+        self._load(0)
+
+    def _load(self, i):
+        """Points the environment and its agent to the i-th simulation and restores the state of this copy.
+        """
+        env = self.env
+        env.sim = self.sims[i]
+        env.agent.sim = self.sims[i]
+        env.agent.viewer = env.viewer if i == 0 else None
+        env.sim.model.body_pos[:] = self._body_pos[i]
+        env.env_step_counter = int(self._step_counters[i])
+        env.terminated = bool(self._terminated[i])
+        env.episode = int(self._episodes[i])
+
+    def _save(self, i):
+        """Stores the state of the i-th copy which is currently loaded into the environment.
+        """
+        env = self.env
+        self._body_pos[i] = env.sim.model.body_pos
+        self._step_counters[i] = env.env_step_counter
+        self._terminated[i] = env.terminated
+        self._episodes[i] = env.episode
+
+    def step(self, actions):
+        """Steps all sub-environments with one action each.
+
+        Args:
+            actions: numpy array (num_envs, action_dim)
+
+        Returns:
+            observations: numpy array (num_envs, obs_dim)
+            rewards: numpy array (num_envs,)
+            dones: boolean numpy array (num_envs,)
+            infos: list with one dict per sub-environment
+        """
+        actions = np.asarray(actions, dtype=np.float64)
+        assert actions.shape[0] == self.num_envs, ("Error, expected one action per environment. Expected: " +
+                                                   str(self.num_envs) + ". Got: " + str(actions.shape[0]))
+        infos = []
+        for i in range(self.num_envs):
+            self._load(i)
+            # the agents may modify the action in place, therefore each environment gets its own copy
+            obs, reward, done, info = self.env.step(actions[i].copy())
+            if done and self.auto_reset:
+                info = dict(info, terminal_observation=obs)
+                obs = self.env.reset()
+            self._observations[i] = obs
+            self._rewards[i] = reward
+            self._dones[i] = done
+            infos.append(info)
+            self._save(i)
+        self._load(0)
+        return self._observations.copy(), self._rewards.copy(), self._dones.copy(), infos
+
+    def reset(self, mask=None):
+        """Resets the sub-environments selected by mask.
+
+        Args:
+            mask: boolean numpy array (num_envs,). If None, all sub-environments are reset.
+
+        Returns:
+            observations of all sub-environments, numpy array (num_envs, obs_dim)
+        """
+        if mask is None:
+            mask = np.ones(self.num_envs, dtype=bool)
+        mask = np.asarray(mask, dtype=bool)
+        assert mask.shape == (self.num_envs,), "Error, mask has to contain one entry per environment."
+
+        for i in np.flatnonzero(mask):
+            self._load(i)
+            self._observations[i] = self.env.reset()
+            self._save(i)
+        self._load(0)
+        return self._observations.copy()
+
+    def seed(self, seed=None):
+        return self.env.seed(seed)
+
+    @property
+    def observation_space(self):
+        return self.env.observation_space
+
+    @property
+    def action_space(self):
+        return self.env.action_space
+
+    @property
+    def observation_dim(self):
+        return self._observations.shape[1]
+
+    @property
+    def action_dim(self):
+        return self.env.action_dim